@@ -5,41 +5,501 @@ Project: python-mini-projects
 
 This script counts the occurrences of each word in a given text file.
 It handles various edge cases, including empty files and files with non-alphanumeric characters.
+The file is read in blocks, so memory use does not grow with the size of the file.
+Large files, whole directories and glob patterns can be counted on several cores.
+For corpora with too many distinct words to count exactly, an approximate mode keeps
+only a Count-Min sketch and the most frequent words in a fixed amount of memory.
+Growing collections can be counted incrementally: an SQLite index keeps the counts
+of every file, so later runs only count new, changed or appended-to data.
 """
 
+import os
 import re
+import glob
+import math
+import mmap
+import json
+import heapq
+import hashlib
+import sqlite3
 import argparse
+from array import array
+from operator import itemgetter
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
-def count_words(filepath):
+from text_tokenizer import BLOCK_SIZE, read_blocks, words
+
+CHUNK_SIZE = 16 * 1024 * 1024  # Bytes counted by one worker task
+END_SAMPLE_SIZE = 4096  # Bytes before the old end of a file compared to detect appends
+# ASCII whitespace never occurs inside a multi-byte UTF-8 character, so the input can
+# be cut after any of these bytes without splitting a character or a word.
+WHITESPACE_BYTES = re.compile(rb'[\t\n\v\f\r\x1c-\x1f ]')
+
+
+def _read_words(filepath, block_size=BLOCK_SIZE):
+    """
+    Reads the words of a text file block by block.
+
+    Yields:
+        Iterables of words (lowercase, alphanumeric only), one per block.
+    """
+    try:
+        for block in read_blocks(filepath, block_size):
+            yield words(block)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Error: File not found at '{filepath}'")
+    except UnicodeDecodeError as e:
+        raise _not_utf8(filepath, e) from None
+
+
+def _not_utf8(filepath, error):
+    """Builds the ValueError for a file that is not UTF-8 text, naming the file."""
+    return ValueError(f"Error: '{filepath}' is not UTF-8 text ({error})")
+
+
+def _decode(data, filepath):
+    """Decodes bytes read from a file as UTF-8, raising a ValueError that names the file."""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise _not_utf8(filepath, e) from None
+
+
+def count_words(filepath, block_size=BLOCK_SIZE):
     """
     Counts the occurrences of each word in a text file.
 
+    The file is read ``block_size`` characters at a time, so memory use does not grow
+    with the size of the file.  The counts are collected in a Counter.
+
     Args:
         filepath: The path to the text file.
+        block_size: The number of characters to read at a time.
 
     Returns:
         A dictionary where keys are words (lowercase, alphanumeric only) and values are their counts.
         Returns an empty dictionary if the file is empty or contains only whitespace.  
-        Raises FileNotFoundError if the file does not exist.
+        Raises FileNotFoundError if the file does not exist, and ValueError if it is
+        not UTF-8 text.
+    """
+
+    word_counts = Counter()
+    for block_words in _read_words(filepath, block_size):
+        word_counts.update(block_words)
+    return word_counts
+
+
+class CountMinSketch:
     """
+    Approximate counts for any number of distinct words in a fixed amount of memory.
+
+    Every word is counted in one cell per row, picked by hashing; its estimate is the
+    smallest of its cells.  Estimates never undercount.  With
+    ``width = ceil(e / epsilon)`` and ``depth = ceil(ln(1 / delta))`` they overcount by
+    more than ``epsilon`` times the total count with probability at most ``delta``.
+    Updates are conservative (only cells below the new estimate are raised), which
+    keeps the estimates tighter still.
+    """
+
+    def __init__(self, epsilon=0.0001, delta=0.01, memory_budget=None):
+        """
+        Args:
+            epsilon: The relative error bound. Defaults to 0.0001.
+            delta: The probability of exceeding the error bound. Defaults to 0.01.
+            memory_budget: If given, the size of the table in bytes; the width is then
+                derived from it and ``epsilon`` is ignored.
+        """
+        self.depth = max(1, math.ceil(math.log(1 / delta)))
+        if memory_budget:
+            self.width = max(1, memory_budget // (8 * self.depth))
+        else:
+            self.width = math.ceil(math.e / epsilon)
+        self.epsilon = math.e / self.width  # The bound the chosen width actually gives
+        self.table = array('Q', bytes(8 * self.width * self.depth))
+        self.total = 0
+
+    def _cells(self, word):
+        # Derive one index per row from two halves of a single hash (double hashing);
+        # hashlib is used because str hashes differ between processes.
+        digest = hashlib.blake2b(word.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [row * self.width + (first + row * step) % self.width for row in range(self.depth)]
+
+    def add(self, word, count=1):
+        """Counts ``count`` more occurrences of a word and returns its new estimate."""
+        cells = self._cells(word)
+        table = self.table
+        estimate = min(table[cell] for cell in cells) + count
+        for cell in cells:
+            if table[cell] < estimate:
+                table[cell] = estimate
+        self.total += count
+        return estimate
+
+    def estimate(self, word):
+        """Returns the estimated count of a word."""
+        return min(self.table[cell] for cell in self._cells(word))
 
+    def error_bound(self):
+        """Returns the amount by which estimates exceed true counts with probability 1 - delta."""
+        return self.epsilon * self.total
+
+
+class TopK:
+    """
+    Keeps the ``k`` words with the highest counts seen so far.
+
+    The candidates and their counts are kept in a dict, and a min-heap of
+    (count, word) entries finds the candidate to evict.  Entries go stale when a
+    candidate's count rises; they are skipped when they reach the top of the heap.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.counts = {}
+        self.heap = []
+
+    def update(self, word, count):
+        """Offers a word with its current (estimated) count."""
+        counts = self.counts
+        if word not in counts and len(counts) >= self.k:
+            while counts.get(self.heap[0][1]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            smallest, candidate = self.heap[0]
+            if count <= smallest:
+                return
+            heapq.heappop(self.heap)
+            del counts[candidate]
+        counts[word] = count
+        heapq.heappush(self.heap, (count, word))
+        if len(self.heap) > 4 * self.k + 64:  # Drop the stale entries
+            self.heap = [(count, word) for word, count in counts.items()]
+            heapq.heapify(self.heap)
+
+    def most_common(self):
+        """Returns the (word, count) pairs, the most frequent first."""
+        return sorted(self.counts.items(), key=itemgetter(1), reverse=True)
+
+
+def count_words_approximate(filepaths, top=10, epsilon=0.0001, delta=0.01, memory_budget=None,
+                            block_size=BLOCK_SIZE):
+    """
+    Finds the most frequent words in one or more text files in bounded memory.
+
+    Words are counted in a CountMinSketch instead of a dict, so memory does not grow
+    with the number of distinct words; a TopK tracker keeps the ``top`` words with the
+    highest estimates.  Each block is first counted exactly, so every distinct word
+    is hashed once per block rather than once per occurrence.
+
+    Args:
+        filepaths: The path to a text file, or a list of paths.
+        top: The number of most frequent words to return. Defaults to 10.
+        epsilon, delta, memory_budget: The sketch's error bounds or size, as for
+            CountMinSketch.
+        block_size: The number of characters to read at a time.
+
+    Returns:
+        A (top_words, sketch) tuple: a list of (word, estimated count) pairs, the most
+        frequent first, and the sketch, which can estimate any other word's count.
+        Raises FileNotFoundError if a file does not exist, and ValueError if one is
+        not UTF-8 text.
+    """
+    if isinstance(filepaths, str):
+        filepaths = [filepaths]
+    sketch = CountMinSketch(epsilon, delta, memory_budget)
+    top_words = TopK(top)
+    for filepath in filepaths:
+        for block_words in _read_words(filepath, block_size):
+            for word, count in Counter(block_words).items():
+                top_words.update(word, sketch.add(word, count))
+    return top_words.most_common(), sketch
+
+
+def _chunk_offsets(filepath, chunk_size=CHUNK_SIZE, start=0, size=None):
+    """
+    Cuts a file into byte ranges of about ``chunk_size`` that do not split a word.
+
+    Args:
+        filepath: The path to the text file.
+        chunk_size: The approximate number of bytes per range.
+        start: Where the first range begins; must not be inside a word.
+        size: Where the last range ends. Defaults to the end of the file.
+
+    Returns:
+        A list of (start, end) byte offsets covering the file from ``start``.
+    """
     try:
-        with open(filepath, 'r', encoding='utf-8') as file:  #Handle potential encoding issues
-            text = file.read()
+        with open(filepath, 'rb') as file:
+            if size is None:
+                size = os.fstat(file.fileno()).st_size
+            if start >= size:
+                return []  # Also, an empty file cannot be memory-mapped
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                offsets = []
+                while start < size:
+                    match = WHITESPACE_BYTES.search(data, min(start + chunk_size, size))
+                    end = match.end() if match else size
+                    offsets.append((start, end))
+                    start = end
+                return offsets
     except FileNotFoundError:
         raise FileNotFoundError(f"Error: File not found at '{filepath}'")
 
-    # Remove punctuation and convert to lowercase
-    text = re.sub(r'[^\w\s]', '', text).lower()
 
-    words = text.split()
-    if not words: #Handle empty files or files with only whitespace
-        return {}
+def _count_chunk(filepath, start, end):
+    """Counts the words in one byte range of a file; runs in a worker process."""
+    with open(filepath, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            text = _decode(data[start:end], filepath)
+    return Counter(words(text))
+
 
-    word_counts = {}
-    for word in words:
-        word_counts[word] = word_counts.get(word, 0) + 1
+def find_text_files(pattern):
+    """
+    Lists the files to count for a path, a directory or a glob pattern.
 
+    A directory stands for every file below it; a glob pattern may use ``**`` to
+    match subdirectories.
+
+    Returns:
+        A sorted list of file paths.
+    """
+    if os.path.isdir(pattern):
+        return sorted(os.path.join(root, name)
+                      for root, _, names in os.walk(pattern) for name in names)
+    if glob.has_magic(pattern):
+        return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return [pattern]
+
+
+def count_words_parallel(filepaths, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Counts the occurrences of each word in one or more text files on several cores.
+
+    Every file is cut into chunks of about ``chunk_size`` bytes at whitespace, so no
+    word is split.  Each worker maps the file and decodes only its own chunk; only
+    the chunk's word counts are sent back, and they are merged into one Counter.
+    The counts are the same as from count_words (summed over the files).
+
+    Args:
+        filepaths: The path to a text file, or a list of paths.
+        workers: The number of worker processes. Defaults to the number of CPUs; with
+            1 (or a single chunk), the chunks are counted in this process.
+        chunk_size: The approximate number of bytes per chunk.
+
+    Returns:
+        A Counter of words (lowercase, alphanumeric only) and their counts.
+        Raises FileNotFoundError if a file does not exist, and ValueError if one is
+        not UTF-8 text.
+    """
+    if isinstance(filepaths, str):
+        filepaths = [filepaths]
+    chunks = [(filepath, start, end) for filepath in filepaths
+              for start, end in _chunk_offsets(filepath, chunk_size)]
+
+    word_counts = Counter()
+    for counts in _count_chunks(chunks, workers):
+        word_counts.update(counts)
+    return word_counts
+
+
+def _count_chunks(chunks, workers=None):
+    """
+    Counts (filepath, start, end) chunks on a process pool, yielding a Counter for each.
+
+    The Counters are yielded in order as they arrive, so callers can merge them one
+    at a time instead of holding every chunk's counts at once.
+    """
+    if workers == 1 or len(chunks) < 2:
+        for chunk in chunks:
+            yield _count_chunk(*chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_count_chunk, *zip(*chunks))
+
+
+class _WordCountIndex:
+    """
+    SQLite index of the word counts of every file counted so far.
+
+    Each file is remembered with its inode, size and modification time, a hash of its
+    last bytes, and the offset just after its last ASCII whitespace.  Words after
+    that offset may be the start of a longer word once more data is appended; they
+    are kept as ``tail_words`` so they can be taken back out of the counts.
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY, path TEXT UNIQUE, inode INTEGER, size INTEGER,
+                mtime_ns INTEGER, end_hash BLOB, offset INTEGER, tail_words TEXT);
+            CREATE TABLE IF NOT EXISTS counts (
+                file INTEGER, word TEXT, count INTEGER, PRIMARY KEY (file, word)) WITHOUT ROWID;
+        """)
+
+    def lookup(self, path):
+        """Returns (id, inode, size, mtime_ns, end_hash, offset, tail_words) or None."""
+        return self.connection.execute(
+            "SELECT id, inode, size, mtime_ns, end_hash, offset, tail_words FROM files "
+            "WHERE path = ?", (path,)).fetchone()
+
+    def add_file(self, path):
+        """Starts tracking a file and returns its id."""
+        return self.connection.execute("INSERT INTO files (path) VALUES (?)", (path,)).lastrowid
+
+    def update_file(self, file_id, stat, end_hash, offset, tail_words):
+        self.connection.execute(
+            "UPDATE files SET inode = ?, size = ?, mtime_ns = ?, end_hash = ?, offset = ?, "
+            "tail_words = ? WHERE id = ?",
+            (stat.st_ino, stat.st_size, stat.st_mtime_ns, end_hash, offset,
+             json.dumps(tail_words), file_id))
+
+    def add_counts(self, file_id, word_counts, sign=1):
+        """Adds (or with ``sign=-1``, subtracts) word counts to a file's counts."""
+        self.connection.executemany(
+            "INSERT INTO counts VALUES (?, ?, ?) "
+            "ON CONFLICT (file, word) DO UPDATE SET count = count + excluded.count",
+            ((file_id, word, sign * count) for word, count in word_counts.items()))
+        if sign < 0:
+            self.connection.execute("DELETE FROM counts WHERE file = ? AND count <= 0", (file_id,))
+
+    def clear_counts(self, file_id):
+        self.connection.execute("DELETE FROM counts WHERE file = ?", (file_id,))
+
+    def prune(self):
+        """Forgets files that no longer exist."""
+        for file_id, path in self.connection.execute("SELECT id, path FROM files").fetchall():
+            if not os.path.exists(path):
+                self.clear_counts(file_id)
+                self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def totals(self, file_ids):
+        """Returns the word counts summed over the given files."""
+        self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS selected (id INTEGER PRIMARY KEY)")
+        self.connection.execute("DELETE FROM selected")
+        self.connection.executemany("INSERT OR IGNORE INTO selected VALUES (?)",
+                                    ((file_id,) for file_id in file_ids))
+        return Counter(dict(self.connection.execute(
+            "SELECT word, SUM(count) FROM counts WHERE file IN (SELECT id FROM selected) "
+            "GROUP BY word")))
+
+    def close(self, commit=True):
+        if commit:
+            self.connection.commit()
+        self.connection.close()
+
+
+def _read_end(filepath, start, size):
+    """
+    Reads the end of the counted range of a file.
+
+    Returns:
+        An (end_hash, offset, tail_words) tuple: the _end_hash at ``size``, the offset
+        just after the last ASCII whitespace at or after ``start`` (``start`` if there
+        is none), and the words after it.
+    """
+    with open(filepath, 'rb') as file:
+        window = END_SAMPLE_SIZE
+        while True:
+            # The word after the last whitespace can be longer than the sample
+            window_start = max(start, size - window)
+            file.seek(window_start)
+            data = file.read(size - window_start)
+            match = None
+            for match in WHITESPACE_BYTES.finditer(data):
+                pass
+            if match or window_start == start:
+                break
+            window *= 2
+    offset = window_start + match.end() if match else start
+    tail = data[offset - window_start:]
+    return _end_hash(filepath, size), offset, list(words(_decode(tail, filepath)))
+
+
+def _end_hash(filepath, size):
+    """Hashes the END_SAMPLE_SIZE bytes before ``size``, as stored by _read_end."""
+    with open(filepath, 'rb') as file:
+        file.seek(max(0, size - END_SAMPLE_SIZE))
+        return hashlib.blake2b(file.read(size - file.tell())).digest()
+
+
+def count_words_incremental(filepaths, index_path, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Counts the occurrences of each word in text files, reusing earlier counts.
+
+    The word counts of every file are kept in an SQLite index at ``index_path``.  A
+    file whose inode, size and modification time are unchanged is not read at all.  A
+    file that grew, and whose last 4 KiB before the old end are unchanged, is treated
+    as appended to: only the new data is counted (the word cut off at the old end is
+    taken back out first).  Any other change recounts the file.  The counts of the
+    files given are then summed.
+
+    Args:
+        filepaths: The path to a text file, or a list of paths.
+        index_path: The path of the index file; it is created if missing.
+        workers: The number of worker processes counting new data. Defaults to 1.
+        chunk_size: The approximate number of bytes per chunk.
+
+    Returns:
+        A Counter of words (lowercase, alphanumeric only) and their counts.
+        Raises FileNotFoundError if a file does not exist, and ValueError if one is
+        not UTF-8 text.
+    """
+    if isinstance(filepaths, str):
+        filepaths = [filepaths]
+    paths = {}  # Absolute path -> path as given, each file once
+    for filepath in filepaths:
+        paths.setdefault(os.path.abspath(filepath), filepath)
+
+    index = _WordCountIndex(index_path)
+    try:
+        file_ids = []
+        jobs = []  # (file id, path, stat, start offset)
+        for path, filepath in paths.items():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Error: File not found at '{filepath}'")
+            row = index.lookup(path)
+            if row is None:
+                file_id, start = index.add_file(path), 0
+            else:
+                file_id, inode, size, mtime_ns, end_hash, offset, tail_words = row
+                if (inode, size, mtime_ns) == (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+                    file_ids.append(file_id)
+                    continue
+                if (inode == stat.st_ino and stat.st_size > size and offset is not None
+                        and (not size or _end_hash(path, size) == end_hash)):
+                    index.add_counts(file_id, Counter(json.loads(tail_words)), sign=-1)
+                    start = offset
+                else:
+                    index.clear_counts(file_id)
+                    start = 0
+            file_ids.append(file_id)
+            jobs.append((file_id, path, stat, start))
+
+        # Count the new data of all files on one pool, then hand each file its chunks.
+        offsets = [_chunk_offsets(path, chunk_size, start, stat.st_size)
+                   for _, path, stat, start in jobs]
+        chunks = [(job[1], *offset) for job, file_offsets in zip(jobs, offsets)
+                  for offset in file_offsets]
+        counts = _count_chunks(chunks, workers)
+        for (file_id, path, stat, start), file_offsets in zip(jobs, offsets):
+            word_counts = Counter()
+            for _ in file_offsets:
+                word_counts.update(next(counts))
+            index.add_counts(file_id, word_counts)
+            index.update_file(file_id, stat, *_read_end(path, start, stat.st_size))
+
+        index.prune()
+        word_counts = index.totals(file_ids)
+    except BaseException:
+        index.close(commit=False)
+        raise
+    index.close()
     return word_counts
 
 
@@ -48,18 +508,62 @@ def main():
     Parses command-line arguments and runs the word counter.
     """
     parser = argparse.ArgumentParser(description="Count words in a text file.")
-    parser.add_argument("filepath", help="Path to the text file")
+    parser.add_argument("filepath",
+                        help="Path to the text file, or a directory or glob pattern of files")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Number of processes counting in parallel (default: 1)")
+    parser.add_argument("--top", type=int, help="Only print the N most frequent words")
+    parser.add_argument("--approximate", action="store_true",
+                        help="Estimate counts in bounded memory (requires --top)")
+    parser.add_argument("--epsilon", type=float, default=0.0001,
+                        help="Relative error bound of approximate counts (default: 0.0001)")
+    parser.add_argument("--delta", type=float, default=0.01,
+                        help="Probability of exceeding the error bound (default: 0.01)")
+    parser.add_argument("--memory", type=float,
+                        help="Memory for approximate counts in MiB (overrides --epsilon)")
+    parser.add_argument("--index",
+                        help="Keep per-file counts in this SQLite file and only count new data")
     args = parser.parse_args()
+    if args.approximate and not args.top:
+        parser.error("--approximate requires --top")
 
     try:
-        word_counts = count_words(args.filepath)
+        filepaths = find_text_files(args.filepath)
+        if args.index:  # The index may live in the directory being counted
+            index_path = os.path.abspath(args.index)
+            filepaths = [path for path in filepaths
+                         if os.path.abspath(path) not in (index_path, index_path + "-journal")]
+        if args.approximate:
+            memory_budget = int(args.memory * 1024 * 1024) if args.memory else None
+            top_words, sketch = count_words_approximate(filepaths, args.top, args.epsilon,
+                                                        args.delta, memory_budget)
+            if top_words:
+                print(f"Top {args.top} words (estimates may exceed the true counts by up to "
+                      f"{sketch.error_bound():.0f}):")
+                for word, count in top_words:
+                    print(f"{word}: ~{count}")
+            else:
+                print("The file is empty or contains only whitespace.")
+            return
+
+        if args.index:
+            word_counts = count_words_incremental(filepaths, args.index, args.workers)
+        elif args.workers == 1 and filepaths == [args.filepath]:
+            word_counts = count_words(args.filepath)
+        else:
+            word_counts = count_words_parallel(filepaths, args.workers)
         if word_counts:
-            print("Word counts:")
-            for word, count in word_counts.items():
+            if args.top:
+                print(f"Top {args.top} words:")
+                items = word_counts.most_common(args.top)
+            else:
+                print("Word counts:")
+                items = word_counts.items()
+            for word, count in items:
                 print(f"{word}: {count}")
         else:
             print("The file is empty or contains only whitespace.")
-    except FileNotFoundError as e:
+    except (FileNotFoundError, ValueError) as e:
         print(e)
     except Exception as e: #Catch any unexpected errors
         print(f"An unexpected error occurred: {e}")
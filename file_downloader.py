@@ -4,50 +4,613 @@ File Downloader
 
 This script downloads files from URLs provided by the user.  It handles potential errors
 such as invalid URLs, network issues, and file access problems.
+
+Large files can be fetched in several parallel segments when the server supports
+HTTP byte ranges; otherwise the file is streamed over a single connection.  Files are
+written to a ``.part`` file first, and interrupted downloads can be resumed from a small
+journal of the byte ranges that already reached the disk.
+
+Many files can be downloaded concurrently from a manifest (``--manifest``) with
+global and per-host concurrency limits, retries and a throughput summary.
+
+With a metadata cache (``--cache``), repeated downloads of the same URL send
+conditional requests and skip the transfer when the server answers 304 Not Modified.
+
+Downloads can be hashed while they stream in (``--hash``) and checked against an
+expected digest, so files never have to be read back just to verify them.
 """
 
 import requests
 import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 8192
+SEGMENT_CHUNK_SIZE = 64 * 1024
+MIN_SEGMENT_SIZE = 1024 * 1024  # Smaller segments cost more in request overhead than they gain
+JOURNAL_INTERVAL = 4 * 1024 * 1024  # Record progress in the journal every 4 MiB per segment
+RETRY_BACKOFF = 0.5  # Seconds before the first retry in manifest mode; doubles each time
+CACHE_MAX_ENTRIES = 10000
+PART_SUFFIX = ".part"
+JOURNAL_SUFFIX = ".json"
+
 
-def download_file(url, output_dir="downloads"):
+class RemoteFileChanged(requests.exceptions.RequestException):
+    """Raised when the server no longer serves the file a partial download started from."""
+
+
+class DigestMismatchError(ValueError):
+    """Raised when a downloaded file does not match its expected digest."""
+
+
+def _make_session(pool_size):
     """
-    Downloads a file from a given URL.
+    Creates a requests session whose connection pool can serve several workers at once.
 
     Args:
-        url: The URL of the file to download.
-        output_dir: The directory to save the downloaded file. Defaults to "downloads".
+        pool_size: The number of connections to keep alive per host.
 
     Returns:
-        The path to the downloaded file, or None if an error occurred.
+        A configured requests.Session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _probe(session, url, headers=None):
     """
+    Asks the server for the size and validators of a file.
 
+    Args:
+        session: The requests session to use.
+        url: The URL of the file.
+        headers: Extra request headers, e.g. conditional headers from the cache.
+
+    Returns:
+        A dictionary with ``size``, ``etag``, ``last_modified`` and ``not_modified``
+        keys.  ``size`` is only set when the server advertises ``Accept-Ranges: bytes``
+        and a ``Content-Length``, i.e. when the file can be fetched in byte ranges.
+    """
+    info = {"size": None, "etag": None, "last_modified": None, "not_modified": False}
     try:
-        # Validate URL
-        parsed_url = urlparse(url)
-        if not all([parsed_url.scheme, parsed_url.netloc]):
-            raise ValueError("Invalid URL format.")
+        response = session.head(url, allow_redirects=True,
+                                headers={"Accept-Encoding": "identity", **(headers or {})})
+        response.raise_for_status()
+    except requests.exceptions.HTTPError:
+        return info  # Some servers reject HEAD; just use a single stream
 
-        # Create output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
+    if response.status_code == 304:
+        info["not_modified"] = True
+        return info
 
-        # Get file name from URL
-        file_name = os.path.basename(parsed_url.path)
-        if not file_name:
-            file_name = "downloaded_file" #default name if no filename in URL
+    info["etag"] = response.headers.get("ETag")
+    info["last_modified"] = response.headers.get("Last-Modified")
+    length = response.headers.get("Content-Length", "")
+    if response.headers.get("Accept-Ranges", "").lower() == "bytes" and length.isdigit():
+        info["size"] = int(length)
+    return info
 
-        output_path = os.path.join(output_dir, file_name)
 
-        # Download the file
-        response = requests.get(url, stream=True)
+def _if_range_validator(info):
+    """Returns the value for an ``If-Range`` header, preferring a strong ETag."""
+    etag = info.get("etag")
+    if etag and not etag.startswith("W/"):  # If-Range only accepts strong ETags
+        return etag
+    return info.get("last_modified")
+
+
+class _PartJournal:
+    """
+    Tracks which byte ranges of a ``.part`` file are already written.
+
+    The journal lives next to the ``.part`` file as a small JSON document holding the
+    completed ranges and the ETag/Last-Modified of the remote file, so a later run can
+    request only the missing bytes.  With ``persist=False`` it is kept in memory only.
+    """
+
+    def __init__(self, part_path, info, completed=None, persist=True):
+        self.path = part_path + JOURNAL_SUFFIX
+        self.size = info["size"]
+        self.etag = info.get("etag")
+        self.last_modified = info.get("last_modified")
+        self.completed = completed or []
+        self.persist = persist
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, part_path, info):
+        """
+        Loads the journal of an earlier attempt if it still describes the remote file.
+
+        Returns:
+            A journal with the completed ranges of the earlier attempt, or an empty
+            journal if there is none, it is unreadable or the remote file has changed.
+        """
+        journal = cls(part_path, info)
+        try:
+            with open(journal.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return journal
+
+        same_file = (
+            state.get("size") == info["size"]
+            and state.get("etag") == info.get("etag")
+            and state.get("last_modified") == info.get("last_modified")
+            and (info.get("etag") or info.get("last_modified"))  # Without validators we can't tell
+            and os.path.exists(part_path)
+            and os.path.getsize(part_path) == info["size"]
+        )
+        if same_file:
+            journal.completed = [tuple(r) for r in state.get("completed", [])]
+        return journal
+
+    def add(self, start, end):
+        """Marks the inclusive byte range ``start``-``end`` as written."""
+        with self._lock:
+            merged = []
+            for r_start, r_end in sorted(self.completed + [(start, end)]):
+                if merged and r_start <= merged[-1][1] + 1:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], r_end))
+                else:
+                    merged.append((r_start, r_end))
+            self.completed = merged
+            self.save()
+
+    def missing(self):
+        """Returns the inclusive byte ranges that still have to be downloaded."""
+        gaps = []
+        position = 0
+        for start, end in self.completed:
+            if start > position:
+                gaps.append((position, start - 1))
+            position = end + 1
+        if position < self.size:
+            gaps.append((position, self.size - 1))
+        return gaps
+
+    def save(self):
+        """Writes the journal atomically so an interruption never leaves it half-written."""
+        if not self.persist:
+            return
+        state = {
+            "size": self.size,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "completed": self.completed,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def discard(self):
+        """Removes the journal file."""
+        _remove_quietly(self.path)
+
+
+class DownloadCache:
+    """
+    Remembers the validators and content hash of earlier downloads, keyed by URL.
+
+    Each entry holds the output path, ETag, Last-Modified, size and SHA-256 of the
+    file (plus any other digests that were computed, keyed by algorithm name), and
+    the time it was last stored or confirmed fresh.  The cache is a JSON
+    file; when saved, entries older than ``max_age`` seconds are dropped and only the
+    ``max_entries`` most recently confirmed entries are kept.
+    """
+
+    def __init__(self, path, max_entries=CACHE_MAX_ENTRIES, max_age=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except ValueError:
+            print(f"Warning: ignoring unreadable download cache '{path}'.")
+            self.entries = {}
+
+    def get(self, url):
+        """Returns the cache entry for a URL, or None if there is no fresh entry."""
+        with self._lock:
+            entry = self.entries.get(url)
+        if entry and self.max_age is not None and time.time() - entry["stored_at"] > self.max_age:
+            return None
+        return entry
+
+    def put(self, url, entry):
+        """Stores (or refreshes) the entry for a URL."""
+        with self._lock:
+            self.entries[url] = dict(entry, stored_at=time.time())
+
+    def save(self):
+        """Evicts stale and surplus entries and writes the cache atomically."""
+        with self._lock:
+            now = time.time()
+            entries = sorted(self.entries.items(), key=lambda item: item[1]["stored_at"], reverse=True)
+            if self.max_age is not None:
+                entries = [(url, e) for url, e in entries if now - e["stored_at"] <= self.max_age]
+            self.entries = dict(entries[:self.max_entries])
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+
+
+def _conditional_headers(entry):
+    """Builds If-None-Match/If-Modified-Since headers from a cache entry."""
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def _hash_file(path, hashers):
+    """Feeds the contents of a file to each of several hashlib objects in one pass."""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(SEGMENT_CHUNK_SIZE), b""):
+            for hasher in hashers:
+                hasher.update(chunk)
+
+
+def _remove_quietly(path):
+    """Deletes a file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _split_ranges(ranges, pieces):
+    """
+    Splits inclusive byte ranges into about ``pieces`` ranges of similar length.
+
+    Args:
+        ranges: A list of (start, end) tuples to cover.
+        pieces: The number of ranges to aim for.
+
+    Returns:
+        A list of (start, end) tuples covering every byte of ``ranges`` exactly once.
+    """
+    total = sum(end - start + 1 for start, end in ranges)
+    piece_size = max(1, -(-total // pieces))  # Ceiling division
+    split = []
+    for start, end in ranges:
+        while start <= end:
+            piece_end = min(end, start + piece_size - 1)
+            split.append((start, piece_end))
+            start = piece_end + 1
+    return split
+
+
+def _preallocate(file, size):
+    """Reserves ``size`` bytes for an open file, falling back to a sparse truncate."""
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(file.fileno(), 0, size)
+            return
+        except OSError:
+            pass  # Not supported by this filesystem
+    file.truncate(size)
+
+
+def _fetch_range(session, url, part_path, start, end, journal, validator=None):
+    """
+    Downloads one byte range of a file and writes it at its offset in the ``.part`` file.
+
+    Progress is recorded in the journal every ``JOURNAL_INTERVAL`` bytes and when the
+    range ends, normally or not, so an interrupted range resumes where it stopped.
+
+    Raises:
+        RemoteFileChanged: If the server answers with the whole file instead of the
+            range, meaning it no longer matches ``validator``.
+        requests.exceptions.RequestException: If the connection ends before the range
+            is complete.
+    """
+    headers = {"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"}
+    if validator:
+        headers["If-Range"] = validator
+    position = recorded = start
+    with session.get(url, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise RemoteFileChanged("Server ignored the Range request; the file may have changed.")
+        with open(part_path, 'r+b') as f:
+            f.seek(start)
+            try:
+                for chunk in response.iter_content(chunk_size=SEGMENT_CHUNK_SIZE):
+                    f.write(chunk)
+                    position += len(chunk)
+                    if position - recorded >= JOURNAL_INTERVAL:
+                        f.flush()  # Data must reach the OS before the journal claims it
+                        journal.add(recorded, min(position, end + 1) - 1)
+                        recorded = position
+            finally:
+                # Also record what arrived before a dropped connection, so a resumed
+                # run only fetches the bytes that are really missing.
+                f.flush()
+                if position > recorded:
+                    journal.add(recorded, min(position, end + 1) - 1)
+
+    if position != end + 1:
+        raise requests.exceptions.RequestException(
+            f"Incomplete segment {start}-{end}: received {position - start} bytes."
+        )
+
+
+def _download_ranges(session, url, part_path, info, segments, resume):
+    """
+    Downloads the missing byte ranges of a file on a pool of ``segments`` workers.
+
+    With ``resume`` the completed ranges are kept in a journal next to the ``.part``
+    file, and ranges finished by an earlier attempt are not requested again.
+    """
+    if resume:
+        journal = _PartJournal.load(part_path, info)
+    else:
+        journal = _PartJournal(part_path, info, persist=False)
+
+    if not journal.completed:
+        with open(part_path, 'wb') as f:
+            _preallocate(f, info["size"])
+        journal.save()
+    elif resume:
+        done = sum(end - start + 1 for start, end in journal.completed)
+        print(f"Resuming download: {done} of {info['size']} bytes already present.")
+
+    ranges = _split_ranges(journal.missing(), segments)
+    validator = _if_range_validator(info)
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        futures = [
+            pool.submit(_fetch_range, session, url, part_path, start, end, journal, validator)
+            for start, end in ranges
+        ]
+        for future in futures:
+            future.result()  # Re-raises the first error from any worker
+    journal.discard()
+
+
+def _download_single(session, url, output_path, headers=None, hashers=()):
+    """
+    Downloads a file over a single streamed connection.
+
+    Args:
+        session: The requests session to use.
+        url: The URL of the file.
+        output_path: Where to write the body.
+        headers: Extra request headers, e.g. conditional headers from the cache.
+        hashers: hashlib objects that are updated with the body as it arrives.
+
+    Returns:
+        A dictionary with the ``etag`` and ``last_modified`` of the response, or None
+        if the server answered 304 Not Modified and nothing was written.
+    """
+    with session.get(url, stream=True, headers=headers) as response:
         response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+        if response.status_code == 304:
+            return None
 
         with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
                 f.write(chunk)
+                for hasher in hashers:
+                    hasher.update(chunk)
+        return {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
 
-        print(f"File downloaded successfully to: {output_path}")
-        return output_path
+
+def _output_path(url, output_dir, target=None):
+    """
+    Works out where a URL should be saved.
+
+    Args:
+        url: The URL of the file to download.
+        output_dir: The directory to save the file in.
+        target: An optional path for the file, relative to ``output_dir``.
+
+    Returns:
+        The output path.
+
+    Raises:
+        ValueError: If the URL is malformed.
+    """
+    # Validate URL
+    parsed_url = urlparse(url)
+    if not all([parsed_url.scheme, parsed_url.netloc]):
+        raise ValueError(f"Invalid URL format: {url}")
+
+    if target:
+        return os.path.join(output_dir, target)
+
+    # Get file name from URL
+    file_name = os.path.basename(parsed_url.path)
+    if not file_name:
+        file_name = "downloaded_file" #default name if no filename in URL
+    return os.path.join(output_dir, file_name)
+
+
+def _download(session, url, output_path, segments=1, resume=False, cache=None,
+              hash_algorithm=None, expected_digest=None):
+    """
+    Downloads a URL to ``output_path`` with an existing session, raising on errors.
+
+    The body is written to ``output_path + ".part"`` and only renamed into place once
+    it is complete (and, with ``expected_digest``, verified).  See download_file for
+    the meaning of the other arguments.
+
+    Returns:
+        A (modified, digest) tuple.  ``modified`` is False if the cache showed the file
+        at ``output_path`` is still current and nothing was downloaded; ``digest`` is
+        the hex digest for ``hash_algorithm``, or None without one.
+
+    Raises:
+        DigestMismatchError: If the file does not match ``expected_digest``.  A freshly
+            downloaded file is removed, together with any resume journal.
+    """
+    # Create output directory if it doesn't exist
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    part_path = output_path + PART_SUFFIX
+    if expected_digest:
+        expected_digest = expected_digest.lower()
+
+    entry = cache.get(url) if cache else None
+    if entry and not (entry["path"] == output_path and os.path.isfile(output_path)
+                      and os.path.getsize(output_path) == entry["size"]):
+        entry = None  # The local copy is gone or was changed; fetch it unconditionally
+    if entry and expected_digest and entry.get(hash_algorithm, expected_digest) != expected_digest:
+        entry = None  # The cached copy is known to be the wrong file
+    headers = _conditional_headers(entry) if entry else None
+
+    algorithms = {name for name in ("sha256" if cache else None, hash_algorithm) if name}
+    hashers = {name: hashlib.new(name) for name in algorithms}
+
+    try:
+        info = _probe(session, url, headers) if segments > 1 or resume else {"size": None}
+        if info["size"]:
+            segments = min(segments, max(1, info["size"] // MIN_SEGMENT_SIZE))
+
+        if info.get("not_modified"):
+            validators = None
+        elif info["size"] and (segments > 1 or resume):
+            validators = info
+            try:
+                _download_ranges(session, url, part_path, info, segments, resume)
+                _hash_file(part_path, hashers.values())  # Ranges arrive out of order
+            except RemoteFileChanged:
+                print("Remote file changed since the partial download; starting over.")
+                _remove_quietly(part_path + JOURNAL_SUFFIX)
+                hashers = {name: hashlib.new(name) for name in algorithms}
+                validators = _download_single(session, url, part_path, hashers=hashers.values())
+        else:
+            validators = _download_single(session, url, part_path, headers, hashers.values())
+    except BaseException:
+        if not resume:
+            _remove_quietly(part_path)  # Never leave a truncated file behind
+        raise
+
+    if validators is None:
+        # Confirmed fresh; only hash the local copy if the cache lacks this digest
+        if hash_algorithm and hash_algorithm not in entry:
+            _hash_file(output_path, hashers.values())
+            entry = dict(entry, **{hash_algorithm: hashers[hash_algorithm].hexdigest()})
+        cache.put(url, entry)
+        digest = entry.get(hash_algorithm) if hash_algorithm else None
+        if expected_digest and digest != expected_digest:
+            raise DigestMismatchError(f"{output_path}: expected {hash_algorithm} "
+                                      f"{expected_digest}, got {digest}")
+        return False, digest
+
+    digests = {name: hasher.hexdigest() for name, hasher in hashers.items()}
+    digest = digests.get(hash_algorithm)
+    if expected_digest and digest != expected_digest:
+        _remove_quietly(part_path)
+        _remove_quietly(part_path + JOURNAL_SUFFIX)
+        raise DigestMismatchError(f"{url}: expected {hash_algorithm} {expected_digest}, "
+                                  f"got {digest}; partial file removed")
+
+    os.replace(part_path, output_path)
+    if cache:
+        cache.put(url, {
+            "path": output_path,
+            "etag": validators["etag"],
+            "last_modified": validators["last_modified"],
+            "size": os.path.getsize(output_path),
+            **digests,
+        })
+    return True, digest
+
+
+def _check_hash_algorithm(hash_algorithm, expected_digest):
+    """
+    Validates the hashing options, defaulting to SHA-256 when only a digest is given.
+
+    Returns:
+        The hash algorithm to use, or None.
+
+    Raises:
+        ValueError: If the algorithm is not supported by hashlib.
+    """
+    if expected_digest and not hash_algorithm:
+        hash_algorithm = "sha256"
+    if hash_algorithm:
+        hash_algorithm = hash_algorithm.lower()
+        if hash_algorithm not in hashlib.algorithms_available:
+            raise ValueError(f"Unsupported hash algorithm: {hash_algorithm}")
+    return hash_algorithm
+
+
+def download_file(url, output_dir="downloads", segments=1, resume=False, cache_path=None,
+                  hash_algorithm=None, expected_digest=None):
+    """
+    Downloads a file from a given URL.
+
+    Args:
+        url: The URL of the file to download.
+        output_dir: The directory to save the downloaded file. Defaults to "downloads".
+        segments: The number of byte ranges to download in parallel. Defaults to 1.
+            Segmented downloads are only used when the server supports HTTP ranges;
+            otherwise the file is streamed over a single connection.
+        resume: Whether to keep the ``.part`` file and its journal when the download
+            is interrupted, and to continue from them on the next call. Defaults to False.
+        cache_path: An optional JSON file used as a DownloadCache. When the URL is in
+            the cache and the local copy is intact, a conditional request is sent and
+            the download is skipped if the server answers 304 Not Modified.
+        hash_algorithm: An optional hashlib algorithm name (e.g. "sha256", "md5",
+            "blake2b") used to hash the file while it is being downloaded.
+        expected_digest: An optional hex digest the file must match (SHA-256 unless
+            ``hash_algorithm`` says otherwise).  On a mismatch the partial file is
+            removed and nothing is written to the output path.
+
+    Returns:
+        The path to the downloaded file, or a (path, hex digest) tuple when a hash
+        algorithm or expected digest is given.  None if an error occurred.
+    """
+
+    try:
+        if not isinstance(segments, int) or segments < 1:
+            raise ValueError("Segments must be a positive integer.")
+
+        hash_algorithm = _check_hash_algorithm(hash_algorithm, expected_digest)
+        output_path = _output_path(url, output_dir)
+
+        # Download the file
+        cache = DownloadCache(cache_path) if cache_path else None
+        try:
+            with _make_session(segments) as session:
+                modified, digest = _download(session, url, output_path, segments, resume, cache,
+                                             hash_algorithm, expected_digest)
+        finally:
+            if cache:
+                cache.save()
+
+        if modified:
+            print(f"File downloaded successfully to: {output_path}")
+        else:
+            print(f"File is up to date: {output_path}")
+        return (output_path, digest) if hash_algorithm else output_path
 
     except requests.exceptions.RequestException as e:
         print(f"Error downloading file: {e}")
@@ -60,8 +623,239 @@ def download_file(url, output_dir="downloads"):
         return None
 
 
+def read_manifest(lines):
+    """
+    Parses a download manifest.
+
+    Each non-empty line is either a bare URL or a JSON object with a ``url`` key, an
+    optional ``path`` key giving the target path and an optional ``digest`` key giving
+    the expected hex digest of the file.  Lines starting with ``#`` are ignored.
+
+    Args:
+        lines: An iterable of manifest lines, such as an open file or ``sys.stdin``.
+
+    Returns:
+        A list of (url, path, digest) tuples; ``path`` and ``digest`` are None when the
+        manifest gives none.
+
+    Raises:
+        ValueError: If a JSON line is malformed or has no ``url``.
+    """
+    entries = []
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on manifest line {line_number}: {e}")
+            if "url" not in record:
+                raise ValueError(f"Manifest line {line_number} has no 'url'.")
+            entries.append((record["url"], record.get("path"), record.get("digest")))
+        else:
+            entries.append((line, None, None))
+    return entries
+
+
+def _is_retryable(error):
+    """Tells whether a failed download is worth another attempt."""
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500  # Other 4xx errors will not go away
+    return isinstance(error, requests.exceptions.RequestException)
+
+
+def download_manifest(entries, output_dir="downloads", workers=8, per_host=4, retries=3,
+                      segments=1, resume=False, cache_path=None, hash_algorithm=None):
+    """
+    Downloads many files concurrently.
+
+    Downloads run on a pool of ``workers`` threads.  Each thread keeps its own session,
+    so connections are reused across files.  Entries wait in a queue per host and are
+    only handed to the pool while fewer than ``per_host`` downloads from their host are
+    running, so a burst for one host never holds threads that other hosts could use.  Failed downloads are retried with exponential backoff
+    when the error looks transient.
+
+    Args:
+        entries: A list of (url, path, digest) tuples, e.g. from read_manifest.  Files
+            with a digest are verified against it while they download.
+        output_dir: The directory to save the files in. Defaults to "downloads".
+        workers: The maximum number of concurrent downloads. Defaults to 8.
+        per_host: The maximum number of concurrent downloads per host. Defaults to 4.
+        retries: How often to retry a failed download. Defaults to 3.
+        segments: Byte-range segments per file, as in download_file. Defaults to 1.
+        resume: Whether to resume partial downloads, as in download_file.
+        cache_path: An optional DownloadCache file, as in download_file.
+        hash_algorithm: The algorithm for computing (and checking) digests. Defaults
+            to SHA-256 when the manifest contains digests.
+
+    Returns:
+        A summary dictionary with the keys ``succeeded``, ``not_modified``, ``failed``
+        (a list of (url, error message) tuples), ``digests`` (a list of (path, hex
+        digest) tuples), ``retries``, ``bytes`` and ``seconds``.
+
+    Raises:
+        ValueError: If ``workers``, ``per_host`` or ``segments`` is not positive,
+            ``retries`` is negative, the hash algorithm is not supported, or two entries would be saved to the same
+            path.
+    """
+    if workers < 1 or per_host < 1 or segments < 1:
+        raise ValueError("Workers, per-host limit and segments must be positive integers.")
+    if retries < 0:
+        raise ValueError("Retries must not be negative.")
+    if not hash_algorithm and any(digest for _, _, digest in entries):
+        hash_algorithm = "sha256"
+    hash_algorithm = _check_hash_algorithm(hash_algorithm, None)
+
+    summary = {"succeeded": 0, "not_modified": 0, "failed": [], "digests": [], "retries": 0,
+               "bytes": 0, "seconds": 0.0}
+    # Work out every output path first: two downloads into one .part file would mix.
+    jobs = []
+    targets = {}
+    for url, target, expected_digest in entries:
+        try:
+            output_path = _output_path(url, output_dir, target)
+        except ValueError as e:
+            summary["failed"].append((url, str(e)))
+            continue
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in targets:
+            raise ValueError(f"Manifest entries {targets[key]} and {url} would both be "
+                             f"saved to {output_path}; give them different paths.")
+        targets[key] = url
+        jobs.append((url, output_path, expected_digest))
+
+    local = threading.local()
+    sessions = []
+    lock = threading.Lock()
+    cache = DownloadCache(cache_path) if cache_path else None
+    pending = {}  # host -> deque of jobs waiting for one of the host's slots
+    for job in jobs:
+        pending.setdefault(urlparse(job[0]).netloc, deque()).append(job)
+    remaining = len(jobs)
+    finished = threading.Event()
+
+    def fetch(url, output_path, expected_digest):
+        if not hasattr(local, "session"):
+            local.session = _make_session(segments)
+            with lock:
+                sessions.append(local.session)
+        for attempt in range(retries + 1):
+            try:
+                modified, digest = _download(local.session, url, output_path, segments,
+                                             resume, cache, hash_algorithm, expected_digest)
+                size = os.path.getsize(output_path) if modified else 0
+                with lock:
+                    summary["succeeded" if modified else "not_modified"] += 1
+                    summary["bytes"] += size
+                    if digest:
+                        summary["digests"].append((output_path, digest))
+                return
+            except Exception as e:
+                if attempt == retries or not _is_retryable(e):
+                    with lock:
+                        summary["failed"].append((url, str(e)))
+                    return
+                with lock:
+                    summary["retries"] += 1
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    def run(host, job):
+        # Once a job is done, its host's slot goes to the host's next waiting job.
+        nonlocal remaining
+        try:
+            fetch(*job)
+        finally:
+            with lock:
+                if pending[host]:
+                    pool.submit(run, host, pending[host].popleft())
+                remaining -= 1
+                if not remaining:
+                    finished.set()
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        with lock:
+            for _ in range(per_host):  # Round-robin, so every host gets started early
+                for host, queue in pending.items():
+                    if queue:
+                        pool.submit(run, host, queue.popleft())
+        if jobs:
+            finished.wait()
+    for session in sessions:
+        session.close()
+    if cache:
+        cache.save()
+    summary["seconds"] = time.monotonic() - started
+    return summary
+
+
+def print_summary(summary):
+    """Prints the report returned by download_manifest."""
+    seconds = max(summary["seconds"], 1e-9)
+    megabytes = summary["bytes"] / (1024 * 1024)
+    print(f"Downloaded {summary['succeeded']} file(s), {megabytes:.1f} MiB "
+          f"in {summary['seconds']:.1f} s ({megabytes / seconds:.1f} MiB/s).")
+    if summary["not_modified"]:
+        print(f"Unchanged (skipped): {summary['not_modified']}")
+    print(f"Retries: {summary['retries']}, failures: {len(summary['failed'])}")
+    for url, error in summary["failed"]:
+        print(f"  FAILED {url}: {error}")
+
+
+def main():
+    """Parses command-line arguments (or prompts for a URL) and downloads the file(s)."""
+    parser = argparse.ArgumentParser(description="Download files from URLs.")
+    parser.add_argument("url", nargs="?", help="URL of the file to download")
+    parser.add_argument("-o", "--output-dir", default="downloads", help="Directory to save files in")
+    parser.add_argument("-s", "--segments", type=int, default=1,
+                        help="Number of parallel byte-range segments (default: 1)")
+    parser.add_argument("-r", "--resume", action="store_true",
+                        help="Keep partial downloads and resume them on the next run")
+    parser.add_argument("-c", "--cache",
+                        help="JSON file caching ETag/Last-Modified to skip unchanged files")
+    parser.add_argument("--hash", dest="hash_algorithm",
+                        help="Hash files while downloading (e.g. sha256, md5, blake2b)")
+    parser.add_argument("--expected-digest", help="Hex digest the downloaded file must match")
+    parser.add_argument("-m", "--manifest",
+                        help="File with one URL or JSON object per line ('-' for stdin)")
+    parser.add_argument("-w", "--workers", type=int, default=8,
+                        help="Concurrent downloads in manifest mode (default: 8)")
+    parser.add_argument("--per-host", type=int, default=4,
+                        help="Concurrent downloads per host in manifest mode (default: 4)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Retries per file in manifest mode (default: 3)")
+    args = parser.parse_args()
+
+    if args.manifest:
+        try:
+            if args.manifest == "-":
+                entries = read_manifest(sys.stdin)
+            else:
+                with open(args.manifest, 'r', encoding='utf-8') as f:
+                    entries = read_manifest(f)
+            summary = download_manifest(entries, args.output_dir, args.workers, args.per_host,
+                                        args.retries, args.segments, args.resume, args.cache,
+                                        args.hash_algorithm)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        for path, digest in summary["digests"]:
+            print(f"{digest}  {path}")
+        print_summary(summary)
+        sys.exit(1 if summary["failed"] else 0)
+
+    url = args.url or input("Enter the URL of the file to download: ")
+    result = download_file(url, args.output_dir, segments=args.segments, resume=args.resume,
+                           cache_path=args.cache, hash_algorithm=args.hash_algorithm,
+                           expected_digest=args.expected_digest)
+    if isinstance(result, tuple):
+        print(f"{result[1]}  {result[0]}")
+
+
 if __name__ == "__main__":
-    url = input("Enter the URL of the file to download: ")
-    download_file(url)
+    main()
 
 ```
\ No newline at end of file
@@ -3,54 +3,979 @@
 File Organizer: This script organizes files in a directory based on their type.
 
 Usage:
-  python file_organizer.py <directory_path>
+  python file_organizer.py <directory_path> [--incremental] [--index PATH]
+                           [--workers N] [--dry-run] [--plan PATH]
+                           [--recursive] [--max-depth N] [--classify {extension,content}]
+                           [--dedup {report,hardlink,quarantine}] [--quarantine DIR]
+                           [--hash-workers N] [--watch] [--debounce SECONDS]
+                           [--poll] [--poll-interval SECONDS]
 
 Arguments:
   <directory_path>  The path to the directory to organize.
+  --incremental     Remember what was already handled in a small SQLite index, so
+                    repeated runs only look at new or changed files.
+  --index PATH      Where to keep the index (default: <directory_path>/.file_organizer.db).
+  --workers N       Number of moves to run concurrently (default: 1).  Helps on network
+                    filesystems, where every move waits on a round trip.
+  --dry-run         Only work out and print the moves, without changing anything.
+  --plan PATH       Write the planned moves (source<TAB>target per line) to PATH.
+  --recursive       Also organize files in subdirectories (into the top-level folders).
+  --max-depth N     How many directory levels below the top to visit (implies --recursive).
+  --classify MODE   "extension" (default) sorts by file extension; "content" reads the
+                    first bytes of each file to detect its real type, so files with a
+                    missing or wrong extension are filed correctly.  Detected types are
+                    cached in the index by inode and modification time.
+  --dedup ACTION    Look for duplicates before moving anything: among the files to be
+                    moved and the files already in the folders they go to.  "report"
+                    only lists them, "hardlink" replaces each copy with a hard link to
+                    the file that is kept, "quarantine" moves the copies aside.
+  --quarantine DIR  Where --dedup quarantine puts copies (default: <directory_path>/duplicates).
+  --hash-workers N  Number of processes hashing whole files (default: number of CPUs).
+  --watch           Keep running and organize new files as they arrive.  Uses inotify on
+                    Linux and falls back to polling elsewhere.
+  --debounce SECS   How long to wait for a burst of new files to end before organizing
+                    them together (default: 0.5).
+  --poll            Poll for new files even where inotify is available, e.g. on network
+                    filesystems that do not report changes made by other machines.
+  --poll-interval SECS  How often to poll (default: 2).
 
 Example:
   python file_organizer.py /path/to/my/files
 """
 
 import os
+import sys
+import time
+import errno
+import struct
+import select
 import shutil
+import ctypes
+import ctypes.util
+import hashlib
+import sqlite3
 import argparse
 import logging
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def organize_files(directory_path):
-    """Organizes files in the specified directory based on their extension."""
+INDEX_FILE_NAME = ".file_organizer.db"
+MTIME_SETTLE_NS = 2 * 10**9  # Coarse filesystem timestamps can hide changes this recent
+SNIFF_SIZE = 512  # Bytes read to detect a file's type; covers the tar header at offset 257
+PARTIAL_HASH_SIZE = 64 * 1024  # Bytes hashed from each end of a file before hashing all of it
+HASH_BLOCK_SIZE = 1024 * 1024
+PARTIAL_HASH_WORKERS = 8  # Partial hashes are dominated by seeks, not CPU
+QUARANTINE_DIR_NAME = "duplicates"
+MAX_BATCH_DELAY = 5.0  # Seconds a steady stream of events may hold back a batch
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+_INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; followed by the name
+
+# (offset, signature, type) checked in order against the first bytes of a file
+_MAGIC_NUMBERS = [
+    (0, b"%PDF-", "pdf"),
+    (0, b"\x89PNG\r\n\x1a\n", "png"),
+    (0, b"\xff\xd8\xff", "jpg"),
+    (0, b"GIF87a", "gif"),
+    (0, b"GIF89a", "gif"),
+    (0, b"II*\x00", "tif"),
+    (0, b"MM\x00*", "tif"),
+    (0, b"\x00\x00\x01\x00", "ico"),
+    (0, b"PK\x03\x04", "zip"),
+    (0, b"PK\x05\x06", "zip"),
+    (0, b"\x1f\x8b", "gz"),
+    (0, b"BZh", "bz2"),
+    (0, b"\xfd7zXZ\x00", "xz"),
+    (0, b"7z\xbc\xaf\x27\x1c", "7z"),
+    (0, b"Rar!\x1a\x07", "rar"),
+    (257, b"ustar", "tar"),
+    (0, b"\x7fELF", "elf"),
+    (0, b"MZ", "exe"),
+    (0, b"\xca\xfe\xba\xbe", "class"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "ole"),
+    (0, b"SQLite format 3\x00", "sqlite"),
+    (0, b"ID3", "mp3"),
+    (0, b"fLaC", "flac"),
+    (0, b"OggS", "ogg"),
+    (4, b"ftyp", "mp4"),
+    (0, b"\x1aE\xdf\xa3", "mkv"),
+    (0, b"{\\rtf", "rtf"),
+    (0, b"%!PS", "ps"),
+]
+_RIFF_TYPES = {b"WAVE": "wav", b"WEBP": "webp", b"AVI ": "avi"}
+
+# Extensions that are kept when the content matches a more general format, e.g. a
+# .docx file is a ZIP archive but should still be filed as docx.
+_COMPATIBLE_EXTENSIONS = {
+    "jpg": {"jpeg", "jpe", "jfif"},
+    "tif": {"tiff", "dng", "cr2", "nef", "arw"},
+    "zip": {"docx", "xlsx", "pptx", "odt", "ods", "odp", "epub", "jar", "apk", "whl", "xpi"},
+    "gz": {"tgz"},
+    "bz2": {"tbz", "tbz2"},
+    "xz": {"txz"},
+    "exe": {"dll", "sys", "scr", "efi"},
+    "elf": {"so", "o", "ko", "bin"},
+    "ole": {"doc", "xls", "ppt", "msi", "msg"},
+    "sqlite": {"db", "sqlite3", "gpkg"},
+    "mp4": {"m4a", "m4v", "m4b", "mov", "3gp", "heic", "heif", "avif"},
+    "ogg": {"oga", "ogv", "opus"},
+    "mkv": {"webm", "mka"},
+}
+
+
+def _sniff_type(head):
+    """
+    Detects a file type from the first bytes of a file.
+
+    Returns:
+        A type name such as "pdf" or "png", "txt" for text without a known signature,
+        or None if the type is unknown.
+    """
+    for offset, signature, file_type in _MAGIC_NUMBERS:
+        if head.startswith(signature, offset):
+            return file_type
+    if head.startswith(b"RIFF") and head[8:12] in _RIFF_TYPES:
+        return _RIFF_TYPES[head[8:12]]
+    if not head or b"\x00" in head:
+        return None
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 3:  # Only a character cut off at the end is allowed
+            return None
+    return "txt"
+
+
+class _OrganizerIndex:
+    """
+    SQLite index of the files organize_files has already looked at and left in place.
+
+    Entries are keyed by the file's path relative to the directory and remember the
+    inode, modification time and size, so an unchanged file is recognised without
+    classifying it again.  Types detected from file contents are cached separately by
+    device and inode, so they survive the file being moved.  The index also remembers
+    the directory's own modification time: if it has not changed, no file was added,
+    removed or renamed and the directory does not need to be scanned.  Entries only
+    hold for the classification mode and depth they were recorded with; when either
+    changes, the entries are forgotten.
+
+    With ``read_only`` the file is never created or written: an existing index is
+    copied into memory, and changes are made (and discarded) there.
+    """
+
+    def __init__(self, path, read_only=False):
+        if read_only:
+            self.connection = sqlite3.connect(":memory:")
+            if os.path.exists(path):
+                source = sqlite3.connect(f"{Path(path).as_uri()}?mode=ro", uri=True)
+                source.backup(self.connection)
+                source.close()
+        else:
+            self.connection = sqlite3.connect(path)
+        # Keep the rollback journal in memory: a journal file created next to the
+        # index would change the modification time of the directory being organized.
+        self.connection.execute("PRAGMA journal_mode=MEMORY")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                name TEXT PRIMARY KEY, inode INTEGER, mtime_ns INTEGER, size INTEGER);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+            CREATE TABLE IF NOT EXISTS types (
+                device INTEGER, inode INTEGER, mtime_ns INTEGER, size INTEGER, type TEXT,
+                PRIMARY KEY (device, inode));
+        """)
+
+    def is_unchanged(self, name, stat):
+        """Tells whether a file was seen before with the same inode, mtime and size."""
+        row = self.connection.execute(
+            "SELECT inode, mtime_ns, size FROM entries WHERE name = ?", (name,)).fetchone()
+        return row == (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def record(self, name, stat):
+        """Remembers a file that was looked at and left in place."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+            (name, stat.st_ino, stat.st_mtime_ns, stat.st_size))
+
+    def prune(self, names):
+        """Forgets every entry whose name is not in ``names``."""
+        self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS present (name TEXT PRIMARY KEY)")
+        self.connection.execute("DELETE FROM present")
+        self.connection.executemany("INSERT INTO present VALUES (?)", ((n,) for n in names))
+        self.connection.execute("DELETE FROM entries WHERE name NOT IN (SELECT name FROM present)")
+
+    def cached_type(self, stat):
+        """Returns the detected type cached for a file (None if unknown), or False if not cached."""
+        row = self.connection.execute(
+            "SELECT mtime_ns, size, type FROM types WHERE device = ? AND inode = ?",
+            (stat.st_dev, stat.st_ino)).fetchone()
+        if row and row[:2] == (stat.st_mtime_ns, stat.st_size):
+            return row[2]
+        return False
+
+    def cache_type(self, stat, file_type):
+        """Remembers the type detected for a file until it is modified."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO types VALUES (?, ?, ?, ?, ?)",
+            (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size, file_type))
+
+    def use_settings(self, settings):
+        """Forgets every entry and the directory mtime if they were recorded with other settings."""
+        if self.get_meta("settings") != settings:
+            self.connection.execute("DELETE FROM entries")
+            self.connection.execute("DELETE FROM meta")
+            self.set_meta("settings", settings)
+
+    def get_meta(self, key):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.connection.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def close(self, commit=True):
+        if commit:
+            self.connection.commit()
+        self.connection.close()
+
+
+def _classify(path, classify, type_cache=None):
+    """
+    Works out the folder a file belongs in.
+
+    With ``classify="extension"`` this is the lower-cased extension.  With "content"
+    the first bytes of the file are checked for a known signature; the extension is
+    kept if it agrees with (or is a specialisation of) the detected type, and text
+    files without an extension are filed as "txt".
+
+    Returns:
+        The folder name, or None if the file should stay where it is.
+    """
+    extension = os.path.splitext(path)[1].lower()[1:]
+    if classify == "extension":
+        return extension or None  # Ignore files without extensions
+
+    try:
+        stat = os.stat(path)
+        detected = type_cache.cached_type(stat) if type_cache else False
+        if detected is False:
+            with open(path, 'rb') as f:
+                detected = _sniff_type(f.read(SNIFF_SIZE))
+            if type_cache:
+                type_cache.cache_type(stat, detected)
+    except OSError as e:
+        logging.error(f"Error reading '{path}': {e}")
+        return extension or None
+
+    if detected in (None, "txt"):
+        return extension or detected  # Text formats are best told apart by extension
+    if extension == detected or extension in _COMPATIBLE_EXTENSIONS.get(detected, ()):
+        return extension
+    return detected
+
+
+def _iter_files(directory_path, max_depth=0, exclude=()):
+    """
+    Yields a DirEntry for every file in a directory.
+
+    Subdirectories are visited down to ``max_depth`` levels (None for no limit), except
+    for the absolute paths in ``exclude``; symbolic links to directories are not followed.
+    """
+    pending = [(directory_path, 0)]
+    while pending:
+        current, depth = pending.pop()
+        try:
+            entries = os.scandir(current)  # File types come without extra stat calls
+        except OSError as e:
+            logging.error(f"Error reading directory '{current}': {e}")
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if ((max_depth is None or depth < max_depth)
+                            and os.path.abspath(entry.path) not in exclude):
+                        pending.append((entry.path, depth + 1))
+                elif entry.is_file():
+                    yield entry
+
+
+def _is_organizable(path, index_path=None):
+    """Tells whether a file may be moved: the index is always left alone."""
+    if os.path.basename(path) == INDEX_FILE_NAME:
+        return False
+    return not index_path or os.path.abspath(path) != index_path
+
+
+def _scan_directory(directory_path, index=None, index_path=None, max_depth=0,
+                    classify="extension", type_cache=None, exclude=()):
+    """
+    Lists the files that should be organized, grouped by the folder they belong in.
+
+    Subdirectories are visited down to ``max_depth`` levels (None for no limit), except
+    for the absolute paths in ``exclude``.  With an index, unchanged files that were
+    left in place before are skipped, and files that stay where they are (no type, or
+    already in the right folder) are recorded so they are skipped next time.
+
+    Returns:
+        A (file_types, present) tuple: ``file_types`` maps each folder name to a list of
+        paths relative to ``directory_path``; ``present`` lists the relative paths the
+        index should keep.
+    """
+    file_types = {}
+    present = []
+    for entry in _iter_files(directory_path, max_depth, exclude):
+        if not _is_organizable(entry.path, index_path):
+            continue
+        relative_path = os.path.relpath(entry.path, directory_path)
+        if index:
+            stat = entry.stat()
+            if index.is_unchanged(relative_path, stat):
+                present.append(relative_path)
+                continue
+
+        folder = _classify(entry.path, classify, type_cache)
+        if folder and os.path.dirname(relative_path) != folder:
+            if folder not in file_types:
+                file_types[folder] = []
+            file_types[folder].append(relative_path)
+        elif index:
+            index.record(relative_path, stat)
+            present.append(relative_path)
+    return file_types, present
+
+
+def _unique_target(target_path, taken):
+    """Returns ``target_path``, or a numbered variant if it is taken or already exists."""
+    base, extension = os.path.splitext(target_path)
+    candidate = target_path
+    number = 1
+    while candidate in taken or os.path.lexists(candidate):
+        candidate = f"{base} ({number}){extension}"
+        number += 1
+    return candidate
+
+
+def plan_moves(directory_path, file_types):
+    """
+    Works out every move up front.
+
+    Files from subdirectories can share a name with each other or with a file at the
+    top level, so their targets are made unique (``name (1).ext``) instead.
+
+    Args:
+        directory_path: The directory being organized.
+        file_types: Maps each folder name to a list of relative paths, as from
+            _scan_directory.
+
+    Returns:
+        A list of (source path, target path) tuples.
+    """
+    plan = []
+    nested = []
+    for folder, files in file_types.items():
+        target_dir = os.path.join(directory_path, folder)
+        for file in files:
+            target_path = os.path.join(target_dir, os.path.basename(file))
+            if os.path.dirname(file):
+                nested.append((file, target_path))
+            else:
+                plan.append((os.path.join(directory_path, file), target_path))
+
+    taken = {target_path for _, target_path in plan}
+    for file, target_path in nested:
+        target_path = _unique_target(target_path, taken)
+        taken.add(target_path)
+        plan.append((os.path.join(directory_path, file), target_path))
+    return plan
+
+
+def _hash_file(path, partial=False):
+    """
+    Hashes a file's contents, or only its first and last PARTIAL_HASH_SIZE bytes.
+
+    Returns:
+        The digest, or None if the file could not be read (the error is logged).
+    """
+    digest = hashlib.blake2b()
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if partial and size > 2 * PARTIAL_HASH_SIZE:
+                digest.update(f.read(PARTIAL_HASH_SIZE))
+                f.seek(size - PARTIAL_HASH_SIZE)
+                digest.update(f.read(PARTIAL_HASH_SIZE))
+            else:
+                while True:
+                    block = f.read(HASH_BLOCK_SIZE)
+                    if not block:
+                        break
+                    digest.update(block)
+    except OSError as e:
+        logging.error(f"Error reading '{path}': {e}")
+        return None
+    return digest.digest()
+
+
+def _regroup(groups, digests):
+    """Splits each group of paths by digest, dropping unreadable files and singletons."""
+    regrouped = []
+    digests = iter(digests)
+    for group in groups:
+        by_digest = {}
+        for path in group:
+            digest = next(digests)
+            if digest is not None:
+                by_digest.setdefault(digest, []).append(path)
+        regrouped.extend(paths for paths in by_digest.values() if len(paths) > 1)
+    return regrouped
+
+
+def find_duplicates(paths, workers=None):
+    """
+    Finds files with identical contents.
+
+    Files are compared in stages, so that most of them are ruled out without reading
+    them in full: first by size, then by a hash of their first and last 64 KiB, and
+    only the remaining candidates are hashed completely, on a pool of processes.
+    Empty files are ignored, and names that are already hard links to one file count
+    as a single file.
+
+    Args:
+        paths: The files to compare.
+        workers: The number of processes hashing whole files. Defaults to the number
+            of CPUs.
+
+    Returns:
+        A list of groups of paths with identical contents.  Each group has at least two
+        members, in the order they were given.
+    """
+    by_size = {}
+    inodes = set()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            logging.error(f"Error reading '{path}': {e}")
+            continue
+        if stat.st_size == 0 or (stat.st_dev, stat.st_ino) in inodes:
+            continue
+        inodes.add((stat.st_dev, stat.st_ino))
+        by_size.setdefault(stat.st_size, []).append(path)
+    groups = [group for group in by_size.values() if len(group) > 1]
+
+    candidates = [path for group in groups for path in group]
+    with ThreadPoolExecutor(max_workers=PARTIAL_HASH_WORKERS) as pool:
+        groups = _regroup(groups, pool.map(_hash_file, candidates, [True] * len(candidates)))
+
+    # The partial hash already covered every byte of small files.
+    duplicates = [group for group in groups if os.path.getsize(group[0]) <= 2 * PARTIAL_HASH_SIZE]
+    groups = [group for group in groups if os.path.getsize(group[0]) > 2 * PARTIAL_HASH_SIZE]
+    if groups:
+        candidates = [path for group in groups for path in group]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            duplicates.extend(_regroup(groups, pool.map(_hash_file, candidates)))
+    return duplicates
+
+
+def _link_duplicate(kept_path, duplicate_path):
+    """
+    Replaces a duplicate with a hard link to the file that is kept.
+
+    The link is made under a temporary name and renamed over the duplicate, so the
+    duplicate's name never disappears.
+
+    Returns:
+        True if the duplicate was replaced, False if that failed (the error is logged).
+    """
+    temporary_path = duplicate_path + ".dedup-tmp"
+    try:
+        os.link(kept_path, temporary_path)
+        os.replace(temporary_path, duplicate_path)
+        return True
+    except OSError as e:
+        logging.error(f"Error linking '{duplicate_path}' to '{kept_path}': {e}")
+        if os.path.lexists(temporary_path):
+            os.remove(temporary_path)
+        return False
+
+
+def _deduplicate(directory_path, file_types, action, quarantine_dir, dry_run=False, workers=None):
+    """
+    Runs the duplicate detection stage of organize_files.
+
+    The files about to be moved are compared with each other and with the files
+    already in the folders they are going to; within each group of duplicates a file
+    that is already in place is kept, otherwise the first one found.
+
+    Returns:
+        A (removed, moves) tuple: the relative paths of quarantined files, which should
+        no longer be organized, and the (source path, target path) moves into the
+        quarantine directory.
+    """
+    paths = []
+    for folder in file_types:
+        try:
+            with os.scandir(os.path.join(directory_path, folder)) as entries:
+                paths.extend(entry.path for entry in entries
+                             if entry.is_file(follow_symlinks=False))
+        except FileNotFoundError:
+            pass  # The folder is created when the files are moved
+    paths.extend(os.path.join(directory_path, file)
+                 for files in file_types.values() for file in files)
+
+    removed = set()
+    moves = []
+    taken = set()
+    count = wasted = 0
+    for kept_path, *duplicate_paths in find_duplicates(paths, workers):
+        count += len(duplicate_paths)
+        wasted += os.path.getsize(kept_path) * len(duplicate_paths)
+        for duplicate_path in duplicate_paths:
+            logging.info(f"Duplicate of '{kept_path}': '{duplicate_path}'")
+            if action == "hardlink" and not dry_run:
+                _link_duplicate(kept_path, duplicate_path)
+            elif action == "quarantine":
+                target_path = _unique_target(
+                    os.path.join(quarantine_dir, os.path.basename(duplicate_path)), taken)
+                taken.add(target_path)
+                moves.append((duplicate_path, target_path))
+                removed.add(os.path.relpath(duplicate_path, directory_path))
+    logging.info(f"Found {count} duplicate files taking up {wasted} bytes.")
+    return removed, moves
+
+
+def _plan(directory_path, file_types, dedup=None, quarantine_dir=None, dry_run=False,
+          hash_workers=None):
+    """
+    Runs the optional duplicate detection stage, then plans the moves.
+
+    Returns:
+        A (plan, file_types) tuple, ``file_types`` without the quarantined files.
+    """
+    quarantine = []
+    if dedup:
+        removed, quarantine = _deduplicate(directory_path, file_types, dedup, quarantine_dir,
+                                           dry_run, hash_workers)
+        file_types = {folder: [file for file in files if file not in removed]
+                      for folder, files in file_types.items()}
+        file_types = {folder: files for folder, files in file_types.items() if files}
+    return plan_moves(directory_path, file_types) + quarantine, file_types
+
+
+def write_plan(plan, output):
+    """Writes a plan as ``source<TAB>target`` lines to an open text file."""
+    for source_path, target_path in plan:
+        output.write(f"{source_path}\t{target_path}\n")
+
+
+def _move(source_path, target_path):
+    """
+    Moves one file, renaming it in place when source and target share a device.
+
+    Returns:
+        True if the file was moved, False if the move failed (the error is logged).
+    """
+    try:
+        try:
+            os.rename(source_path, target_path)  # A single metadata operation
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(source_path, target_path)  # Another device: copy, then delete
+        logging.info(f"Moved '{os.path.basename(source_path)}' to '{os.path.dirname(target_path)}'")
+        return True
+    except shutil.Error as e:
+        logging.error(f"Error moving '{os.path.basename(source_path)}': {e}")
+    except OSError as e:
+        logging.error(f"Error moving '{os.path.basename(source_path)}': {e}")
+    return False
+
+
+def execute_plan(plan, workers=1):
+    """
+    Carries out a plan of moves.
+
+    All target directories are created once before any file is moved; the moves then
+    run on a pool of ``workers`` threads.  If a target directory cannot be created
+    (say, a file of the same name is in the way), the error is logged and only the
+    moves into that directory are skipped.
+
+    Args:
+        plan: A list of (source path, target path) tuples, as from plan_moves.
+        workers: The number of moves to run concurrently. Defaults to 1.
+
+    Returns:
+        A (moved, failed) tuple of counts; skipped moves count as failed.
+    """
+    unusable = set()
+    for target_dir in sorted({os.path.dirname(target) for _, target in plan}):
+        try:
+            os.makedirs(target_dir, exist_ok=True)
+        except OSError as e:
+            logging.error(f"Error creating directory '{target_dir}': {e}")
+            unusable.add(target_dir)
+    runnable = [move for move in plan if os.path.dirname(move[1]) not in unusable]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda move: _move(*move), runnable))
+    moved = sum(results)
+    return moved, len(plan) - moved
+
+
+def organize_files(directory_path, incremental=False, index_path=None, workers=1, dry_run=False,
+                   plan_path=None, max_depth=0, classify="extension", dedup=None,
+                   quarantine_dir=None, hash_workers=None):
+    """
+    Organizes files in the specified directory based on their type.
+
+    The work happens in three phases: the directory is scanned (and optionally checked
+    for duplicates), every move is planned, and the plan is executed.  A timing
+    summary of the phases is logged at the end.
+
+    Args:
+        directory_path: The path to the directory to organize.
+        incremental: Whether to keep an index of the files already looked at, so that
+            repeated runs skip unchanged files (and the whole scan if the directory
+            itself is unchanged). Defaults to False.
+        index_path: Where to keep the index. Defaults to ``.file_organizer.db`` inside
+            the directory; the index file itself is never moved.
+        workers: The number of moves to run concurrently. Defaults to 1.
+        dry_run: Whether to only print the plan without moving anything. Defaults to False.
+        plan_path: An optional file to write the plan to, one ``source<TAB>target`` per line.
+        max_depth: How many levels of subdirectories to organize as well; 0 (the
+            default) only looks at the top level, None has no limit.  Files from
+            subdirectories are moved into the top-level folders.
+        classify: "extension" (the default) files by extension; "content" detects
+            the type from the first bytes of each file, caching the result in the
+            index by inode and modification time so unchanged files are not read again.
+        dedup: What to do with duplicate files found before moving: None (the default)
+            skips the check, "report" only logs them, "hardlink" replaces each copy
+            with a hard link to the kept file, and "quarantine" moves the copies into
+            ``quarantine_dir`` instead of organizing them.
+        quarantine_dir: Where quarantined copies go. Defaults to ``duplicates`` inside
+            the directory; it is never organized itself.
+        hash_workers: The number of processes hashing whole files. Defaults to the
+            number of CPUs.
+    """
 
     if not os.path.isdir(directory_path):
         logging.error(f"Error: Invalid directory path: {directory_path}")
         return
 
-    file_types = {}
-    for filename in os.listdir(directory_path):
-        filepath = os.path.join(directory_path, filename)
-        if os.path.isfile(filepath):
-            extension = os.path.splitext(filename)[1].lower()
-            if extension:  # Ignore files without extensions
-                if extension not in file_types:
-                    file_types[extension] = []
-                file_types[extension].append(filename)
-
-    for extension, files in file_types.items():
-        target_dir = os.path.join(directory_path, extension[1:]) #remove leading dot
-        if not os.path.exists(target_dir):
-            os.makedirs(target_dir)
-        for file in files:
-            source_path = os.path.join(directory_path, file)
-            target_path = os.path.join(target_dir, file)
+    if not isinstance(workers, int) or workers < 1:
+        logging.error(f"Error: Workers must be a positive integer, got {workers}")
+        return
+
+    if classify not in ("extension", "content"):
+        logging.error(f"Error: Unknown classification mode: {classify}")
+        return
+
+    if dedup not in (None, "report", "hardlink", "quarantine"):
+        logging.error(f"Error: Unknown duplicate action: {dedup}")
+        return
+    quarantine_dir = os.path.abspath(
+        quarantine_dir or os.path.join(directory_path, QUARANTINE_DIR_NAME))
+
+    database = None
+    if incremental or classify == "content":
+        index_path = os.path.abspath(index_path or os.path.join(directory_path, INDEX_FILE_NAME))
+        database = _OrganizerIndex(index_path, read_only=dry_run)
+    index = database if incremental else None
+    if index:
+        index.use_settings(f"{classify}:{max_depth}")
+
+    try:
+        started = time.perf_counter()
+        # Stat the directory before scanning, so changes made during the scan are
+        # noticed on the next run.  Its mtime only reflects files added or removed at
+        # the top level, and not content changes, so other modes always scan.
+        directory_mtime = os.stat(directory_path).st_mtime_ns
+        mtime_covers_changes = max_depth == 0 and classify == "extension"
+        if (index and mtime_covers_changes
+                and index.get_meta("directory_mtime_ns") == directory_mtime):
+            logging.info(f"No changes in '{directory_path}' since the last run.")
+            return
+
+        file_types, present = _scan_directory(directory_path, index, index_path, max_depth,
+                                              classify, database, exclude={quarantine_dir})
+        plan, file_types = _plan(directory_path, file_types, dedup, quarantine_dir, dry_run,
+                                 hash_workers)
+        planned = time.perf_counter()
+
+        if plan_path:
+            with open(plan_path, 'w', encoding='utf-8') as f:
+                write_plan(plan, f)
+        if dry_run:
+            write_plan(plan, sys.stdout)
+            logging.info(f"Dry run: planned {len(plan)} moves into {len(file_types)} directories "
+                         f"in {planned - started:.3f} s.")
+            return
+
+        moved, failed = execute_plan(plan, workers)
+        finished = time.perf_counter()
+        rate = moved / (finished - planned) if finished > planned else 0.0
+        logging.info(f"Scanned and planned {len(plan)} moves in {planned - started:.3f} s; "
+                     f"moved {moved} files in {finished - planned:.3f} s ({rate:.0f} files/s), "
+                     f"{failed} failed.")
+
+        if index:
+            index.prune(present)
+            if mtime_covers_changes and time.time_ns() - directory_mtime > MTIME_SETTLE_NS:
+                index.set_meta("directory_mtime_ns", directory_mtime)
+    finally:
+        if database:
+            database.close(commit=not dry_run)
+
+
+def _load_inotify():
+    """Returns libc with the inotify functions, or None where inotify is not available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class _InotifyWatcher:
+    """
+    Reports files written or moved into a directory tree, using inotify through ctypes.
+
+    Files are reported once they are closed after writing (or moved in), not when they
+    are created, so half-written files are not organized.  New subdirectories within
+    ``max_depth`` are watched as they appear, and files already inside them reported.
+    """
+
+    def __init__(self, libc, directory_path, max_depth=0, exclude=()):
+        self.libc = libc
+        self.max_depth = max_depth
+        self.exclude = exclude
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.watches = {}  # watch descriptor -> (directory path, depth)
+        self.found = set()  # Files found in newly watched directories
+        self.overflowed = False  # Set when the kernel dropped events
+        self._watch_tree(directory_path, 0)
+        self.found.clear()
+
+    def _watch_tree(self, path, depth):
+        """Watches a directory and its subdirectories, noting the files already there."""
+        pending = [(path, depth)]
+        while pending:
+            current, depth = pending.pop()
+            # Watch before listing, so no file can slip in between the two.  IN_ONLYDIR
+            # makes the call fail if the directory was replaced by a file in the meantime.
+            wd = self.libc.inotify_add_watch(
+                self.fd, os.fsencode(current),
+                IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_ONLYDIR)
+            if wd < 0:
+                error = ctypes.get_errno()
+                logging.error(f"Error watching '{current}': {os.strerror(error)}")
+                continue
+            self.watches[wd] = (current, depth)
             try:
-                shutil.move(source_path, target_path)
-                logging.info(f"Moved '{file}' to '{target_dir}'")
-            except shutil.Error as e:
-                logging.error(f"Error moving '{file}': {e}")
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if not entry.is_dir(follow_symlinks=False):
+                            self.found.add(entry.path)
+                        elif self._should_watch(entry.path, depth + 1):
+                            pending.append((entry.path, depth + 1))
             except OSError as e:
-                logging.error(f"Error moving '{file}': {e}")
+                logging.error(f"Error reading directory '{current}': {e}")
+
+    def _should_watch(self, path, depth):
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        return os.path.abspath(path) not in self.exclude
+
+    def read(self, timeout=None):
+        """
+        Waits up to ``timeout`` seconds (None: indefinitely) for new files.
+
+        Returns:
+            The set of paths of new or rewritten files; empty if the time ran out.
+        """
+        if self.found:
+            timeout = 0
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                data = b""
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                offset += _INOTIFY_EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    self.overflowed = True
+                elif mask & IN_IGNORED:
+                    self.watches.pop(wd, None)  # The directory was removed or moved away
+                elif wd in self.watches:
+                    parent, depth = self.watches[wd]
+                    path = os.path.join(parent, name)
+                    if mask & IN_ISDIR:
+                        if self._should_watch(path, depth + 1):
+                            self._watch_tree(path, depth + 1)
+                    elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                        self.found.add(path)
+        found, self.found = self.found, set()
+        return found
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingWatcher:
+    """
+    Reports new or changed files by listing the tree every ``interval`` seconds.
+
+    Used where inotify is unavailable or cannot see every change, such as network
+    filesystems.  Only modification times and sizes are compared, nothing is read.  A
+    file is reported once it looks the same in two polls in a row, so files that are
+    still being written are left alone.
+    """
+
+    def __init__(self, directory_path, max_depth=0, exclude=(), interval=2.0):
+        self.directory_path = directory_path
+        self.max_depth = max_depth
+        self.exclude = exclude
+        self.interval = interval
+        self.overflowed = False
+        self.snapshot = self._snapshot()
+        self.reported = dict(self.snapshot)  # Path -> signature it was last reported with
+        self.next_poll = time.monotonic() + interval
+
+    def _snapshot(self):
+        snapshot = {}
+        for entry in _iter_files(self.directory_path, self.max_depth, self.exclude):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # Removed since it was listed
+            snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read(self, timeout=None):
+        """Like _InotifyWatcher.read, but changes are only seen every ``interval`` seconds."""
+        delay = max(self.next_poll - time.monotonic(), 0)
+        if timeout is not None and timeout < delay:
+            time.sleep(timeout)
+            return set()
+        time.sleep(delay)
+        self.next_poll = time.monotonic() + self.interval
+        snapshot = self._snapshot()
+        found = {path for path, signature in snapshot.items()
+                 if self.snapshot.get(path) == signature != self.reported.get(path)}
+        self.reported = {path: signature for path, signature in snapshot.items()
+                         if path in found or self.reported.get(path) == signature}
+        self.snapshot = snapshot
+        return found
+
+    def close(self):
+        pass
+
+
+def watch_directory(directory_path, incremental=False, index_path=None, workers=1, max_depth=0,
+                    classify="extension", dedup=None, quarantine_dir=None, hash_workers=None,
+                    debounce=0.5, poll=False, poll_interval=2.0):
+    """
+    Organizes a directory, then keeps organizing new files as they arrive.
+
+    Instead of rescanning the directory, the watcher is told about new files (through
+    inotify on Linux, otherwise by polling).  Events are collected until none has
+    arrived for ``debounce`` seconds (or for at most MAX_BATCH_DELAY seconds), and the
+    files are then classified, checked for duplicates and moved together.  Runs until
+    interrupted.
+
+    Args:
+        directory_path: The path to the directory to organize.
+        incremental, index_path, workers, max_depth, classify, dedup, quarantine_dir,
+            hash_workers: As for organize_files.  The index is only used by the
+            initial full run; the type cache is used throughout.
+        debounce: Seconds without events after which a batch is organized. Defaults to 0.5.
+        poll: Whether to poll even if inotify is available. Defaults to False.
+        poll_interval: Seconds between polls. Defaults to 2.
+    """
+    if not os.path.isdir(directory_path):
+        logging.error(f"Error: Invalid directory path: {directory_path}")
+        return
+
+    index_path = os.path.abspath(index_path or os.path.join(directory_path, INDEX_FILE_NAME))
+    quarantine_dir = os.path.abspath(
+        quarantine_dir or os.path.join(directory_path, QUARANTINE_DIR_NAME))
+    exclude = {quarantine_dir}
+    # Start watching before the initial run, so files that arrive during it are not
+    # missed: they show up as events (which are harmless for files it has moved).
+    libc = None if poll else _load_inotify()
+    if libc:
+        watcher = _InotifyWatcher(libc, directory_path, max_depth, exclude)
+    else:
+        watcher = _PollingWatcher(directory_path, max_depth, exclude, poll_interval)
+    type_cache = None
+
+    try:
+        organize_files(directory_path, incremental=incremental, index_path=index_path,
+                       workers=workers, max_depth=max_depth, classify=classify, dedup=dedup,
+                       quarantine_dir=quarantine_dir, hash_workers=hash_workers)
+        type_cache = _OrganizerIndex(index_path) if classify == "content" else None
+        logging.info(f"Watching '{directory_path}' for new files "
+                     f"({'inotify' if libc else 'polling'}). Press Ctrl+C to stop.")
+        while True:
+            found = watcher.read()
+            deadline = time.monotonic() + MAX_BATCH_DELAY
+            while time.monotonic() < deadline:
+                more = watcher.read(debounce)
+                if not more:
+                    break
+                found |= more
+
+            if watcher.overflowed:
+                logging.warning("Too many events at once; rescanning the directory.")
+                watcher.overflowed = False
+                file_types, _ = _scan_directory(directory_path, None, index_path, max_depth,
+                                                classify, type_cache, exclude)
+            else:
+                file_types = {}
+                for path in sorted(found):
+                    if not os.path.isfile(path) or not _is_organizable(path, index_path):
+                        continue  # Already moved or removed again
+                    relative_path = os.path.relpath(path, directory_path)
+                    folder = _classify(path, classify, type_cache)
+                    if folder and os.path.dirname(relative_path) != folder:
+                        file_types.setdefault(folder, []).append(relative_path)
+            if not file_types:
+                continue
+
+            started = time.perf_counter()
+            plan, _ = _plan(directory_path, file_types, dedup, quarantine_dir,
+                            hash_workers=hash_workers)
+            moved, failed = execute_plan(plan, workers)
+            if type_cache:
+                type_cache.connection.commit()
+            logging.info(f"Organized a batch of {moved} files in "
+                         f"{time.perf_counter() - started:.3f} s, {failed} failed.")
+    except KeyboardInterrupt:
+        logging.info("Stopped watching.")
+    finally:
+        watcher.close()
+        if type_cache:
+            type_cache.close()
 
 
 def main():
@@ -58,9 +983,52 @@ def main():
 
     parser = argparse.ArgumentParser(description="Organize files in a directory.")
     parser.add_argument("directory_path", help="The path to the directory to organize")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep an index so repeated runs only handle new or changed files")
+    parser.add_argument("--index", help="Path of the index file (default: inside the directory)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Number of moves to run concurrently (default: 1)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the planned moves without changing anything")
+    parser.add_argument("--plan", help="Write the planned moves to this file")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Also organize files in subdirectories")
+    parser.add_argument("--max-depth", type=int,
+                        help="Levels of subdirectories to visit (implies --recursive)")
+    parser.add_argument("--classify", choices=["extension", "content"], default="extension",
+                        help="Sort by extension or by the file's detected content type")
+    parser.add_argument("--dedup", choices=["report", "hardlink", "quarantine"],
+                        help="Look for duplicate files before organizing and act on them")
+    parser.add_argument("--quarantine", help="Where to move duplicates with --dedup quarantine")
+    parser.add_argument("--hash-workers", type=int,
+                        help="Number of processes hashing whole files (default: number of CPUs)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and organize new files as they arrive")
+    parser.add_argument("--debounce", type=float, default=0.5,
+                        help="Seconds to wait for a burst of new files to end (default: 0.5)")
+    parser.add_argument("--poll", action="store_true",
+                        help="Poll for new files instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="Seconds between polls (default: 2)")
     args = parser.parse_args()
+    if args.watch and (args.dry_run or args.plan):
+        parser.error("--watch cannot be combined with --dry-run or --plan")
+
+    max_depth = args.max_depth
+    if max_depth is None:
+        max_depth = None if args.recursive else 0
 
-    organize_files(args.directory_path)
+    if args.watch:
+        watch_directory(args.directory_path, incremental=args.incremental, index_path=args.index,
+                        workers=args.workers, max_depth=max_depth, classify=args.classify,
+                        dedup=args.dedup, quarantine_dir=args.quarantine,
+                        hash_workers=args.hash_workers, debounce=args.debounce, poll=args.poll,
+                        poll_interval=args.poll_interval)
+    else:
+        organize_files(args.directory_path, incremental=args.incremental, index_path=args.index,
+                       workers=args.workers, dry_run=args.dry_run, plan_path=args.plan,
+                       max_depth=max_depth, classify=args.classify, dedup=args.dedup,
+                       quarantine_dir=args.quarantine, hash_workers=args.hash_workers)
 
 if __name__ == "__main__":
     main()
@@ -7,12 +7,66 @@ This module provides a function to check if a given number is a prime number.
 A prime number is a natural number greater than 1 that is not a product of two smaller natural numbers.  A natural number greater than 1 that is not prime is called a composite number.
 
 This implementation handles edge cases such as numbers less than 2 and efficiently checks for primality.
+
+Small numbers are checked by trial division; larger ones are first screened against a
+wheel of small primes and then tested with Miller-Rabin, which is deterministic below
+3.3e24 and probabilistic (with a negligible error rate) above.  factorize splits numbers
+into primes with Pollard's rho method (Brent's variant).
+
+For many numbers at once, a segmented Sieve of Eratosthenes answers whole lists and ranges
+(check_primes, primes_in_range, count_primes) with memory bounded per segment.  NumPy is used
+for the sieve when it is installed.
+
+Services that call is_prime over and over can enable a cached prime table
+(enable_prime_table): a bit-packed bitmap of the odd numbers that answers in O(1), grows
+on demand, and can be saved to a file that later processes map read-only at startup.
 """
 
+import os
+import mmap
+import random
+import tempfile
+import threading
+from bisect import bisect_left
+from itertools import compress
+from math import gcd, isqrt, prod
+
+try:
+    import numpy as np
+except ImportError:  # The pure Python sieve is used instead
+    np = None
+
+SEGMENT_SIZE = 1 << 20  # Odd numbers sieved at a time (one byte each)
+WHEEL_LIMIT = 1000  # Primes below this are tried before Miller-Rabin
+PROBABILISTIC_ROUNDS = 40  # Random Miller-Rabin bases beyond the deterministic range
+SIEVE_MIN_RUN = 64  # Fewer numbers than this in a segment are tested one by one
+# Larger numbers are never sieved: their base primes would not fit in one segment
+SIEVE_MAX = (2 * SEGMENT_SIZE) ** 2
+TABLE_MAGIC = b"PRIMBITS"  # File header: magic, then the table limit as 8 bytes
+TABLE_HEADER_SIZE = 16
+
+# (bound, bases): Miller-Rabin with these bases is exact for every n below the bound
+MILLER_RABIN_BASES = [
+    (2_047, (2,)),
+    (1_373_653, (2, 3)),
+    (25_326_001, (2, 3, 5)),
+    (3_215_031_751, (2, 3, 5, 7)),
+    (2_152_302_898_747, (2, 3, 5, 7, 11)),
+    (3_474_749_660_383, (2, 3, 5, 7, 11, 13)),
+    (341_550_071_728_321, (2, 3, 5, 7, 11, 13, 17)),
+    (3_825_123_056_546_413_051, (2, 3, 5, 7, 11, 13, 17, 19, 23)),
+    (318_665_857_834_031_151_167_461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+    (3_317_044_064_679_887_385_961_981, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)),
+]
+
 def is_prime(number):
     """
     Checks if a given number is a prime number.
 
+    The method is chosen by size: numbers below WHEEL_LIMIT are looked up, and numbers
+    with a prime factor below WHEEL_LIMIT are found with a single gcd.  Anything left
+    below WHEEL_LIMIT squared is prime; larger numbers are tested with Miller-Rabin.
+
     Args:
         number: An integer.
 
@@ -23,14 +77,467 @@ def is_prime(number):
     if not isinstance(number, int):
         raise TypeError("Input must be an integer.")
 
-    if number < 2:
+    if _cache.table is not None and 0 <= number < _cache.max_limit:
+        return _cache.lookup(number)
+    if number < WHEEL_LIMIT:
+        return number in _WHEEL_PRIME_SET
+    if gcd(number, _WHEEL_PRODUCT) != 1:
         return False
+    if number < WHEEL_LIMIT * WHEEL_LIMIT:
+        return True  # No prime factor up to its square root
+    return _miller_rabin(number)
+
+
+def _is_strong_probable_prime(n, base, d, s):
+    """One Miller-Rabin round: tests ``n - 1 == d * 2**s`` (d odd) against ``base``."""
+    x = pow(base, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def _miller_rabin(n, rounds=PROBABILISTIC_ROUNDS):
+    """
+    Tests an odd number ``n`` with no small prime factors for primality.
+
+    Below 3.3e24 the bases from MILLER_RABIN_BASES make the answer exact.  Above, the
+    thirteen fixed bases are followed by ``rounds`` random ones; a composite passes
+    each round with probability at most 1/4.
+    """
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for bound, bases in MILLER_RABIN_BASES:
+        if n < bound:
+            break
+    else:
+        bases = bases + tuple(random.randrange(2, n - 1) for _ in range(rounds))
+    return all(_is_strong_probable_prime(n, base, d, s) for base in bases)
+
+
+def _pollard_brent(n):
+    """
+    Finds a nontrivial factor of an odd composite number with Pollard's rho method.
+
+    Uses Brent's cycle detection, and multiplies up to 128 differences together
+    before taking a gcd; a random polynomial is retried if a run fails.
+    """
+    while True:
+        y, c, m = random.randrange(1, n), random.randrange(1, n), 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:  # The batched product hit zero: step back one at a time
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def factorize(number):
+    """
+    Splits a positive integer into its prime factors.
+
+    Prime factors below WHEEL_LIMIT are divided out by trial division; what is left
+    is split with Pollard's rho method until every part passes is_prime.
+
+    Args:
+        number: A positive integer.
+
+    Returns:
+        The prime factors in increasing order, repeated by multiplicity (an empty list
+        for 1).  Raises TypeError if input is not an integer, ValueError if it is not
+        positive.
+    """
+    _check_int(number)
+    if number < 1:
+        raise ValueError("Input must be a positive integer.")
+
+    factors = []
+    for p in _WHEEL_PRIMES:
+        if p * p > number:
+            break
+        while number % p == 0:
+            factors.append(p)
+            number //= p
+    pending = [number] if number > 1 else []
+    while pending:
+        n = pending.pop()
+        if is_prime(n):
+            factors.append(n)
+        else:
+            d = _pollard_brent(n)
+            pending += [d, n // d]
+    return sorted(factors)
+
+
+def _check_int(value):
+    if not isinstance(value, int):
+        raise TypeError("Input must be an integer.")
+
+
+def _small_primes(limit):
+    """Returns the list of primes up to and including ``limit``, with a simple sieve."""
+    if limit < 2:
+        return []
+    flags = bytearray([1]) * (limit + 1)
+    flags[0] = flags[1] = 0
+    for p in range(2, isqrt(limit) + 1):
+        if flags[p]:
+            flags[p * p::p] = bytes(len(range(p * p, limit + 1, p)))
+    return list(compress(range(limit + 1), flags))
+
+
+_WHEEL_PRIMES = _small_primes(WHEEL_LIMIT - 1)
+_WHEEL_PRIME_SET = frozenset(_WHEEL_PRIMES)
+_WHEEL_PRODUCT = prod(_WHEEL_PRIMES)
+
+
+def _sieve_segment(start, length, base_primes):
+    """
+    Sieves the odd numbers ``start, start + 2, ..., start + 2 * (length - 1)``.
+
+    Args:
+        start: An odd number.
+        length: How many odd numbers to sieve.
+        base_primes: All primes up to the square root of the last number, or more.
+
+    Returns:
+        A sequence of flags (a bytearray, or a NumPy array) where flag ``i`` is 1 if
+        ``start + 2 * i`` is prime.
+    """
+    end = start + 2 * length  # Exclusive
+    flags = np.ones(length, dtype=np.uint8) if np is not None else bytearray([1]) * length
+    for p in base_primes[1:]:  # Even numbers are not in the segment
+        if p * p >= end:
+            break
+        first = max(p * p, (start + p - 1) // p * p)
+        if first % 2 == 0:
+            first += p  # The next odd multiple
+        index = (first - start) // 2
+        if index < length:
+            if np is not None:
+                flags[index::p] = 0
+            else:
+                flags[index::p] = bytes(len(range(index, length, p)))
+    if start == 1:
+        flags[0] = 0  # 1 is not prime
+    return flags
+
+
+def _odd_primes(start, flags):
+    """Returns the numbers ``start + 2 * i`` whose flag ``i`` is set."""
+    if np is not None:
+        return (start + 2 * np.flatnonzero(flags)).tolist()
+    return compress(range(start, start + 2 * len(flags), 2), flags)
+
+
+def _extend_primes(primes, covered, limit, segment_size=SEGMENT_SIZE):
+    """
+    Extends ``primes``, the list of all primes up to ``covered``, up to ``limit``.
+
+    The new range is sieved in segments, with base primes found the same way, so at
+    most one segment of flags is held at a time.  Start with ``primes=[]`` and
+    ``covered=1``.
+
+    Returns:
+        The new bound, ``max(covered, limit)``.
+    """
+    if limit <= covered:
+        return covered
+    root = isqrt(limit)
+    if root > covered:
+        covered = _extend_primes(primes, covered, root, segment_size)
+    if covered < 2:
+        primes.append(2)
+    start = (covered + 1) | 1  # The first odd number not yet covered
+    while start <= limit:
+        length = min(segment_size, (limit - start) // 2 + 1)
+        primes.extend(_odd_primes(start, _sieve_segment(start, length, primes)))
+        start += 2 * length
+    return limit
+
+
+def _segments(lo, hi, segment_size=SEGMENT_SIZE):
+    """
+    Sieves the odd numbers in [lo, hi) one segment at a time.
+
+    Yields:
+        (start, flags) tuples as from _sieve_segment.
+    """
+    start = max(lo, 1) | 1  # The first odd number
+    if start >= hi:
+        return
+    base_primes = []
+    _extend_primes(base_primes, 1, isqrt(hi - 1), segment_size)
+    while start < hi:
+        length = min(segment_size, (hi - start + 1) // 2)
+        yield start, _sieve_segment(start, length, base_primes)
+        start += 2 * length
+
+
+def primes_in_range(lo, hi, segment_size=SEGMENT_SIZE):
+    """
+    Generates the primes ``p`` with ``lo <= p < hi``, in increasing order.
+
+    Only one segment of ``segment_size`` odd numbers is held in memory at a time.
+
+    Args:
+        lo: The lower bound (inclusive).
+        hi: The upper bound (exclusive).
+        segment_size: The number of odd numbers sieved at a time.
+
+    Yields:
+        The primes in the range.  Raises TypeError if a bound is not an integer.
+    """
+    _check_int(lo)
+    _check_int(hi)
+    if lo <= 2 < hi:
+        yield 2
+    for start, flags in _segments(lo, hi, segment_size):
+        yield from _odd_primes(start, flags)
+
+
+def count_primes(n, segment_size=SEGMENT_SIZE):
+    """
+    Counts the primes less than or equal to ``n``.
+
+    Args:
+        n: An integer.
+        segment_size: The number of odd numbers sieved at a time.
+
+    Returns:
+        The number of primes up to ``n``.  Raises TypeError if ``n`` is not an integer.
+    """
+    _check_int(n)
+    if n < 2:
+        return 0
+    count = 1  # The prime 2
+    for _, flags in _segments(3, n + 1, segment_size):
+        count += int(flags.sum()) if np is not None else flags.count(1)
+    return count
+
+
+def check_primes(numbers, segment_size=SEGMENT_SIZE):
+    """
+    Checks a whole list (or range) of numbers for primality at once.
+
+    The distinct numbers are sorted, and every run of at least SIEVE_MIN_RUN numbers
+    that fits in one segment is answered by a single sieve spanning just that run, so
+    a dense range costs about as much as sieving it.  Sparse numbers, and numbers of
+    SIEVE_MAX or more, are tested one by one with is_prime.  The base primes are
+    only sieved as far as the runs actually sieved need them.
+
+    Args:
+        numbers: An iterable of integers.
+        segment_size: The largest number of odd numbers sieved at a time.
+
+    Returns:
+        A list of booleans, True where the number at the same position is prime.
+        Raises TypeError if a number is not an integer.
+    """
+    numbers = list(numbers)
+    for number in numbers:
+        _check_int(number)
+    odd = sorted({number for number in numbers if number > 2 and number % 2})
+    primes = {2}
+    base_primes, covered = [], 1
+    i = 0
+    while i < len(odd):
+        start = odd[i]
+        # The run of numbers that fit in a segment starting at ``start``
+        j = bisect_left(odd, start + 2 * segment_size, i)
+        if j - i < SIEVE_MIN_RUN or odd[j - 1] >= SIEVE_MAX:
+            primes.update(number for number in odd[i:j] if is_prime(number))
+        else:
+            covered = _extend_primes(base_primes, covered, isqrt(odd[j - 1]))
+            length = (odd[j - 1] - start) // 2 + 1
+            flags = _sieve_segment(start, length, base_primes)
+            primes.update(number for number in odd[i:j] if flags[(number - start) // 2])
+        i = j
+    return [number in primes for number in numbers]
+
+
+def _pack_flags(flags):
+    """
+    Packs 0/1 flags into bits: flag ``i`` becomes bit ``i % 8`` of byte ``i // 8``.
+
+    The length of ``flags`` must be a multiple of 8.  Without NumPy, the flags are
+    read as one big integer and every 8 bytes are folded into one in three shifts.
+    """
+    if np is not None:
+        return np.packbits(flags, bitorder='little').tobytes()
+    size = len(flags)
+    bits = int.from_bytes(flags, 'little')  # Flag i is bit 8 * i
+    for shift, pattern in ((7, b"\x03\x00"), (14, b"\x0f" + bytes(3)), (28, b"\xff" + bytes(7))):
+        mask = int.from_bytes(pattern * (size // len(pattern)), 'little')
+        bits = (bits | bits >> shift) & mask
+    return bits.to_bytes(size, 'little')[::8]
+
+
+class PrimeTable:
+    """
+    Bit-packed table of the primes below ``limit``.
+
+    Only odd numbers are stored: bit ``i % 8`` of byte ``i // 8`` is set if ``2 * i + 1``
+    is prime, so 10**9 numbers take 62.5 MB.  ``limit`` is always a multiple of 16,
+    so the table ends on a whole byte.  A table loaded from a file maps it read-only;
+    extending it copies it into memory first.
+    """
+
+    def __init__(self, limit=0):
+        self.limit = 0
+        self.bits = bytearray()
+        self._mapping = None
+        self.extend(limit)
+
+    def __contains__(self, number):
+        """Tells whether ``number`` (below ``limit``) is prime."""
+        if number % 2 == 0:
+            return number == 2
+        index = number >> 1
+        return number > 1 and bool(self.bits[index >> 3] >> (index & 7) & 1)
+
+    def extend(self, limit):
+        """Sieves the numbers from the current limit up to ``limit`` (rounded up to 16)."""
+        limit = -(-limit // 16) * 16
+        if limit <= self.limit:
+            return
+        if self._mapping is not None:
+            self.bits = bytearray(self.bits)
+            self.close()
+        for _, flags in _segments(self.limit, limit):
+            self.bits += _pack_flags(flags)
+        self.limit = limit
+
+    def save(self, path):
+        """
+        Writes the table to a file.
+
+        The file is written under a temporary name and renamed into place, so other
+        processes never map a half-written table.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".primes-")
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(TABLE_MAGIC + self.limit.to_bytes(8, 'little'))
+                file.write(self.bits)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """
+        Maps a table saved with save read-only, without reading it into memory.
+
+        Returns:
+            The table.  Raises ValueError if the file is not a prime table.
+        """
+        with open(path, 'rb') as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        limit = int.from_bytes(mapping[8:TABLE_HEADER_SIZE], 'little')
+        if (mapping[:8] != TABLE_MAGIC
+                or len(mapping) != TABLE_HEADER_SIZE + limit // 16 or limit % 16):
+            mapping.close()
+            raise ValueError(f"Not a prime table: {path}")
+        table = cls()
+        table.limit = limit
+        table.bits = memoryview(mapping)[TABLE_HEADER_SIZE:]
+        table._mapping = mapping
+        return table
+
+    def close(self):
+        """Releases the mapped file, if any."""
+        if self._mapping is not None:
+            if isinstance(self.bits, memoryview):
+                self.bits.release()
+            self._mapping.close()
+            self._mapping = None
+
+
+class _TableCache:
+    """The process-wide prime table used by is_prime, and how far it may grow."""
+
+    def __init__(self):
+        self.table = None
+        self.max_limit = 0
+        self.path = None
+        self.lock = threading.Lock()
+
+    def lookup(self, number):
+        if number >= self.table.limit:
+            with self.lock:
+                if number >= self.table.limit:
+                    # Grow geometrically, so a series of rising queries sieves each
+                    # number only a few times.
+                    self.table.extend(min(max(number + 1, 2 * self.table.limit), self.max_limit))
+                    if self.path:
+                        self.table.save(self.path)
+        return number in self.table
+
+
+_cache = _TableCache()
+
+
+def enable_prime_table(max_limit=10**9, path=None, initial_limit=1 << 20):
+    """
+    Makes is_prime answer numbers below ``max_limit`` from a cached prime table.
+
+    The table starts at ``initial_limit`` (or what the file at ``path`` holds) and is
+    extended on demand, at least doubling each time, up to ``max_limit``; larger
+    numbers are still tested with Miller-Rabin.  With ``path``, an existing table is
+    mapped read-only, so startup costs no sieving, and the table is saved back there
+    whenever it grows.
+
+    Args:
+        max_limit: Numbers below this are answered from the table. Defaults to 10**9
+            (a table of 62.5 MB).
+        path: An optional file to load the table from and save it to.
+        initial_limit: How far to sieve up front when there is no file yet.
+
+    Returns:
+        The PrimeTable.
+    """
+    _check_int(max_limit)
+    disable_prime_table()
+    if path and os.path.exists(path):
+        table = PrimeTable.load(path)
+    else:
+        table = PrimeTable(min(initial_limit, max_limit))
+        if path:
+            table.save(path)
+    with _cache.lock:
+        _cache.table, _cache.max_limit, _cache.path = table, max_limit, path
+    return table
+
 
-    # Optimization: Check divisibility only up to the square root of the number
-    for i in range(2, int(number**0.5) + 1):
-        if number % i == 0:
-            return False
-    return True
+def disable_prime_table():
+    """Stops using the cached prime table and frees it."""
+    with _cache.lock:
+        table, _cache.table, _cache.max_limit = _cache.table, None, 0
+        if table is not None:
+            table.close()
 
 
 def main():
@@ -45,6 +552,9 @@ def main():
             number = int(num_str)
             if is_prime(number):
                 print(f"{number} is a prime number.")
+            elif number > 1:
+                factors = " * ".join(str(factor) for factor in factorize(number))
+                print(f"{number} is not a prime number ({number} = {factors}).")
             else:
                 print(f"{number} is not a prime number.")
         except ValueError:
@@ -5,7 +5,7 @@ simple_spell_checker.py
 A simple spell checker that uses a built-in word list for comparison.  This is a basic example and does not include advanced features like phonetic matching or context-aware correction.
 """
 
-import re
+from text_tokenizer import tokenize
 
 # A simple word list.  For a production system, use a much larger and more comprehensive list.
 WORD_LIST = ["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog"]
@@ -28,12 +28,9 @@ def check_spelling(text):
     if not text:  # Handle empty string
         return []
 
-    # Clean the text: remove punctuation, convert to lowercase
-    text = re.sub(r'[^\w\s]', '', text).lower()
-    words = text.split()
-
+    # Split into words without punctuation, in lowercase
     misspelled_words = []
-    for word in words:
+    for word in tokenize(text):
         if word not in WORD_LIST:
             misspelled_words.append(word)
 